@@ -1,37 +1,52 @@
 # app/config.py
 import os
+import sys
 from pathlib import Path
 from dataclasses import dataclass, field
 
 from dotenv import load_dotenv
 
-# Load .env from project root (works both locally and on EC2)
-# Try multiple paths to find .env file
-possible_roots = [
-    Path(__file__).parent.parent.parent,  # From app/config.py -> project root
-    Path.cwd(),  # Current working directory
-]
-
-env_path = None
-for root in possible_roots:
-    candidate = root / ".env"
-    if candidate.exists():
-        env_path = candidate
-        break
-
-if env_path is None:
-    # Try current directory as last resort
-    env_path = Path(".env")
-
-# Load the .env file
-if env_path.exists():
+
+def _load_env_once() -> Path | None:
+    """
+    Find and load the .env file.
+
+    Called once at import time; Python's module cache means a normal
+    import runs it a single time per process.
+
+    Returns:
+        Path of the loaded .env file, or None if none was found
+    """
+    # Load .env from project root (works both locally and on EC2)
+    # Try multiple paths to find .env file
+    possible_roots = [
+        Path(__file__).parent.parent.parent,  # From app/config.py -> project root
+        Path.cwd(),  # Current working directory
+    ]
+
+    env_path = None
+    for root in possible_roots:
+        candidate = root / ".env"
+        if candidate.exists():
+            env_path = candidate
+            break
+
+    if env_path is None:
+        # Try current directory as last resort
+        env_path = Path(".env")
+
+    # Load the .env file
+    if not env_path.exists():
+        print(f"Warning: .env file not found. Tried: {[str(r / '.env') for r in possible_roots]}", file=sys.stderr)
+        return None
+
     result = load_dotenv(env_path, override=True)
     if not result:
-        import sys
         print(f"Warning: .env file exists at {env_path} but load_dotenv returned False. Check file format.", file=sys.stderr)
-else:
-    import sys
-    print(f"Warning: .env file not found. Tried: {[str(r / '.env') for r in possible_roots]}", file=sys.stderr)
+    return env_path
+
+
+_load_env_once()
 
 
 @dataclass
@@ -39,6 +54,8 @@ class DatasetConfig:
     hf_name: str = "scientific_papers"
     hf_config: str = "arxiv"
     max_papers: int = 5  # tweak for cost/runtime
+    # Scan the HF cache for leftover *.incomplete dirs before loading
+    cleanup_incomplete_cache: bool = field(default_factory=lambda: os.getenv("HF_CACHE_CLEANUP", "1") != "0")
 
 
 @dataclass
@@ -46,23 +63,43 @@ class ChunkingConfig:
     chunk_size_tokens: int = 300
     chunk_overlap_tokens: int = 50
     strategy: str = "semantic"  # Options: "fixed_size", "sentence_based", "semantic"
+    # Processes build_index chunks paper batches on; 1 keeps chunking in-process
+    num_workers: int = field(default_factory=lambda: int(os.getenv("CHUNKING_NUM_WORKERS", "1")))
 
 
 @dataclass
 class WeaviateConfig:
     # For Cloud, this must be your REST endpoint URL
-    # Note: os.getenv() is called at class definition time, after load_dotenv above
-    url: str = os.getenv("WEAVIATE_URL", "") or ""
-    api_key: str | None = os.getenv("WEAVIATE_API_KEY") or None
+    # Env-backed fields use default_factory so they are read when AppConfig is
+    # instantiated (after _load_env_once), not at class definition time
+    url: str = field(default_factory=lambda: os.getenv("WEAVIATE_URL", "") or "")
+    api_key: str | None = field(default_factory=lambda: os.getenv("WEAVIATE_API_KEY") or None)
     class_name: str = "PaperChunk"
     vector_dim: int = 1536  # text-embedding-3-small
-    batch_size: int = 32
+
+
+@dataclass
+class EmbeddingConfig:
+    # On-disk embedding cache; relative paths are resolved against the project root
+    cache_path: str = field(default_factory=lambda: os.getenv("EMBEDDING_CACHE_PATH", "hf_cache/embeddings.sqlite"))
+    # Storage precision for cached vectors: "fp32", "fp16" or "int8" (Weaviate always gets fp32)
+    cache_precision: str = field(default_factory=lambda: os.getenv("EMBED_PRECISION", "fp32"))
+    # Chunks embedded per indexing step; get_openai_embeddings splits a step into
+    # concurrent API requests, so 8 x 100 keeps all request slots busy
+    batch_size: int = 800
+
+
+@dataclass
+class RerankerConfig:
+    # Optional INT8 ONNX export of the model (see scripts/export_reranker_onnx.py);
+    # when set, reranking runs on ONNX Runtime instead of PyTorch
+    onnx_path: str = field(default_factory=lambda: os.getenv("RERANKER_ONNX_PATH", ""))
 
 
 @dataclass
 class LLMConfig:
-    provider: str = os.getenv("LLM_PROVIDER", "openai")
-    model: str = os.getenv("LLM_MODEL", "gpt-4o-mini")
+    provider: str = field(default_factory=lambda: os.getenv("LLM_PROVIDER", "openai"))
+    model: str = field(default_factory=lambda: os.getenv("LLM_MODEL", "gpt-4o-mini"))
     temperature: float = 0.1
     max_tokens: int = 512
 
@@ -72,6 +109,8 @@ class AppConfig:
     dataset: DatasetConfig = field(default_factory=DatasetConfig)
     chunking: ChunkingConfig = field(default_factory=ChunkingConfig)
     weaviate: WeaviateConfig = field(default_factory=WeaviateConfig)
+    embedding: EmbeddingConfig = field(default_factory=EmbeddingConfig)
+    reranker: RerankerConfig = field(default_factory=RerankerConfig)
     llm: LLMConfig = field(default_factory=LLMConfig)
 
 
@@ -1,7 +1,8 @@
 # app/data/load_arxiv.py
+import os
 import shutil
 import time
-from typing import List, Dict
+from typing import Iterator, List, Dict
 from pathlib import Path
 
 from datasets import load_dataset
@@ -9,16 +10,40 @@ from datasets import load_dataset
 from app.config import config
 
 
+# Rows decoded per Arrow -> Python conversion while streaming
+_READ_BATCH_SIZE = 256
+
+
+def _iter_incomplete(root: Path) -> Iterator[Path]:
+    """
+    Yield directories under `root` whose name ends with ".incomplete".
+
+    Walks with os.scandir, which gets entry types from the directory listing
+    itself, so plain files are never stat-ed (unlike Path.rglob). Matching
+    directories are not descended into since they are about to be removed.
+    """
+    stack = [str(root)]
+    while stack:
+        try:
+            with os.scandir(stack.pop()) as entries:
+                for entry in entries:
+                    if not entry.is_dir(follow_symlinks=False):
+                        continue
+                    if entry.name.endswith(".incomplete"):
+                        yield Path(entry.path)
+                    else:
+                        stack.append(entry.path)
+        except OSError:
+            continue
+
+
 def _cleanup_incomplete_cache(cache_dir: Path) -> None:
     """
     Remove incomplete cache directories that might be locked by previous failed runs.
     This helps prevent PermissionError on Windows.
     """
-    # Find all directories ending with .incomplete
-    for item in cache_dir.rglob("*"):
-        if not item.is_dir() or not item.name.endswith(".incomplete"):
-            continue
-        incomplete_dir = item
+    # Collect first so we don't delete directories while scandir is iterating them
+    for incomplete_dir in list(_iter_incomplete(cache_dir)):
         try:
             print(f"Cleaning up incomplete cache: {incomplete_dir}")
             # On Windows, files might be locked briefly, so retry with a small delay
@@ -36,11 +61,22 @@ def _cleanup_incomplete_cache(cache_dir: Path) -> None:
             print(f"Warning: Error cleaning up {incomplete_dir}: {e}")
 
 
-def load_arxiv_papers() -> List[Dict]:
+def _join_column(values: List | None, n_rows: int) -> List[str]:
+    """Flatten a text column whose cells may be lists of paragraphs."""
+    if values is None:
+        return [""] * n_rows
+    return [" ".join(v) if isinstance(v, list) else (v or "") for v in values]
+
+
+def iter_arxiv_papers() -> Iterator[Dict]:
     """
-    Load a subset of the arxiv portion of the scientific_papers dataset.
+    Stream a subset of the arxiv portion of the scientific_papers dataset.
 
-    Returns a list of dicts with keys: id, title, abstract, article.
+    Papers are yielded as they are decoded, so callers that process them in
+    batches (e.g. scripts/build_index.py) never hold the whole subset.
+
+    Yields:
+        Dicts with keys: id, title, abstract, article
     """
     ds_conf = config.dataset
     print(f"Loading dataset {ds_conf.hf_name}/{ds_conf.hf_config}...")
@@ -52,7 +88,9 @@ def load_arxiv_papers() -> List[Dict]:
     print(f"Using Hugging Face cache dir: {cache_dir}")
     
     # Clean up any incomplete cache directories to prevent PermissionError
-    _cleanup_incomplete_cache(cache_dir)
+    # (set HF_CACHE_CLEANUP=0 to skip the scan, e.g. on large production caches)
+    if ds_conf.cleanup_incomplete_cache:
+        _cleanup_incomplete_cache(cache_dir)
 
     dataset = load_dataset(
         ds_conf.hf_name,
@@ -66,20 +104,29 @@ def load_arxiv_papers() -> List[Dict]:
     max_papers = ds_conf.max_papers
     print(f"Streaming first {max_papers} papers (no full download needed)")
 
-    papers = []
-    for i, row in enumerate(dataset):
-        if i >= max_papers:
-            break
-        papers.append(
-            {
-                "id": str(i),
-                "title": row.get("title", ""),
-                "abstract": " ".join(row.get("abstract", []))
-                if isinstance(row.get("abstract"), list)
-                else row.get("abstract", ""),
-                "article": " ".join(row.get("article", []))
-                if isinstance(row.get("article"), list)
-                else row.get("article", ""),
+    n_papers = 0
+    # Read column-oriented batches: one Arrow -> Python conversion per batch
+    # instead of one dict materialization per row
+    for batch in dataset.take(max_papers).iter(batch_size=_READ_BATCH_SIZE):
+        n_rows = len(next(iter(batch.values()), []))
+        titles = batch.get("title") or [""] * n_rows
+        abstracts = _join_column(batch.get("abstract"), n_rows)
+        articles = _join_column(batch.get("article"), n_rows)
+        for title, abstract, article in zip(titles, abstracts, articles):
+            yield {
+                "id": str(n_papers),
+                "title": title or "",
+                "abstract": abstract,
+                "article": article,
             }
-        )
-    return papers
+            n_papers += 1
+
+
+def load_arxiv_papers() -> List[Dict]:
+    """
+    Load a subset of the arxiv portion of the scientific_papers dataset.
+
+    Returns a list of dicts with keys: id, title, abstract, article.
+    Prefer iter_arxiv_papers() when the papers are consumed once.
+    """
+    return list(iter_arxiv_papers())
@@ -1,67 +1,85 @@
-from typing import List, Dict, Literal
+from dataclasses import dataclass
+from typing import Callable, Iterable, Iterator, List, Dict, Literal
 import re
 
+import numpy as np
+
 from app.config import config
 
 
+@dataclass(slots=True, frozen=True)
+class ChunkRecord:
+    """
+    One chunk of a paper, as stored in Weaviate.
+
+    Slotted instead of a dict: much smaller per chunk, and every chunk of a
+    paper shares the same title/abstract string objects.
+    """
+    paper_id: str
+    title: str
+    abstract: str
+    chunk_text: str
+    start_token: int
+    end_token: int
+    chunking_strategy: str
+
+
+# Whitespace run that follows sentence-ending punctuation
+_SENT_RE = re.compile(r"(?<=[.!?])\s+")
+
+
 def _split_text_into_tokens(text: str) -> List[str]:
     # Simple whitespace tokenizer; Session 2 can replace with tiktoken/semantic
     return text.split()
 
 
-def _tokens_to_text(tokens: List[str]) -> str:
-    return " ".join(tokens)
-
-
 def _split_into_sentences(text: str) -> List[str]:
     """Split text into sentences using simple regex."""
     # Simple sentence splitting (can be improved with nltk/spacy)
-    sentences = re.split(r'(?<=[.!?])\s+', text)
+    sentences = _SENT_RE.split(text)
     return [s.strip() for s in sentences if s.strip()]
 
 
-def chunk_paper_fixed_size(paper: Dict) -> List[Dict]:
+def chunk_paper_fixed_size(paper: Dict) -> List[ChunkRecord]:
     """
     Chunk using fixed-size windows (original strategy).
     Good for: Consistent chunk sizes, simple implementation.
     """
+    # Read config and paper fields once, not once per chunk
     ch_conf = config.chunking
-    tokens = _split_text_into_tokens(paper["article"])
-    chunks = []
-
-    step = ch_conf.chunk_size_tokens - ch_conf.chunk_overlap_tokens
-    for start in range(0, len(tokens), step):
-        end = start + ch_conf.chunk_size_tokens
-        chunk_tokens = tokens[start:end]
-        if not chunk_tokens:
-            continue
+    size = ch_conf.chunk_size_tokens
+    step = size - ch_conf.chunk_overlap_tokens
+    paper_id, title, abstract = paper["id"], paper["title"], paper["abstract"]
 
-        chunk_text = _tokens_to_text(chunk_tokens)
-        chunks.append(
-            {
-                "paper_id": paper["id"],
-                "title": paper["title"],
-                "abstract": paper["abstract"],
-                "chunk_text": chunk_text,
-                "start_token": start,
-                "end_token": min(end, len(tokens)),
-                "chunking_strategy": "fixed_size",
-            }
+    tokens = _split_text_into_tokens(paper["article"])
+    n_tokens = len(tokens)
+
+    return [
+        ChunkRecord(
+            paper_id=paper_id,
+            title=title,
+            abstract=abstract,
+            chunk_text=" ".join(tokens[start:start + size]),
+            start_token=start,
+            end_token=min(start + size, n_tokens),
+            chunking_strategy="fixed_size",
         )
+        for start in range(0, n_tokens, step)
+    ]
 
-    return chunks
 
-
-def chunk_paper_sentence_based(paper: Dict, max_sentences: int = 10, overlap_sentences: int = 2) -> List[Dict]:
+def chunk_paper_sentence_based(paper: Dict, max_sentences: int = 10, overlap_sentences: int = 2) -> List[ChunkRecord]:
     """
     Chunk using sentence boundaries.
     Good for: Preserving sentence integrity, better context.
     """
+    paper_id, title, abstract = paper["id"], paper["title"], paper["abstract"]
     sentences = _split_into_sentences(paper["article"])
+    n_sentences = len(sentences)
     chunks = []
     
     step = max_sentences - overlap_sentences
-    for start in range(0, len(sentences), step):
+    for start in range(0, n_sentences, step):
         end = start + max_sentences
         chunk_sentences = sentences[start:end]
         if not chunk_sentences:
@@ -69,21 +87,21 @@ def chunk_paper_sentence_based(paper: Dict, max_sentences: int = 10, overlap_sen
         
         chunk_text = " ".join(chunk_sentences)
         chunks.append(
-            {
-                "paper_id": paper["id"],
-                "title": paper["title"],
-                "abstract": paper["abstract"],
-                "chunk_text": chunk_text,
-                "start_token": start,
-                "end_token": min(end, len(sentences)),
-                "chunking_strategy": "sentence_based",
-            }
+            ChunkRecord(
+                paper_id=paper_id,
+                title=title,
+                abstract=abstract,
+                chunk_text=chunk_text,
+                start_token=start,
+                end_token=min(end, n_sentences),
+                chunking_strategy="sentence_based",
+            )
         )
     
     return chunks
 
 
-def chunk_paper_semantic(paper: Dict, chunk_size_tokens: int = 300, similarity_threshold: float = 0.7) -> List[Dict]:
+def chunk_paper_semantic(paper: Dict, chunk_size_tokens: int = 300, similarity_threshold: float = 0.7) -> List[ChunkRecord]:
     """
     Chunk using semantic similarity (simplified version).
     Groups sentences/chunks that are semantically similar.
@@ -94,55 +112,62 @@ def chunk_paper_semantic(paper: Dict, chunk_size_tokens: int = 300, similarity_t
     """
     # For simplicity, we'll use sentence-based with some heuristics
     # In production, you'd use embeddings and similarity clustering
+    paper_id, title, abstract = paper["id"], paper["title"], paper["abstract"]
     sentences = _split_into_sentences(paper["article"])
+    n_sentences = len(sentences)
     chunks = []
-    current_chunk = []
-    current_size = 0
-    
-    for sentence in sentences:
-        sentence_tokens = len(sentence.split())
-        
-        # Start new chunk if adding this sentence would exceed size
-        if current_size + sentence_tokens > chunk_size_tokens and current_chunk:
-            chunk_text = " ".join(current_chunk)
-            chunks.append(
-                {
-                    "paper_id": paper["id"],
-                    "title": paper["title"],
-                    "abstract": paper["abstract"],
-                    "chunk_text": chunk_text,
-                    "start_token": len(chunks),
-                    "end_token": len(chunks) + 1,
-                    "chunking_strategy": "semantic",
-                }
-            )
-            # Keep last few sentences for overlap
-            overlap = current_chunk[-2:] if len(current_chunk) >= 2 else current_chunk
-            current_chunk = overlap + [sentence]
-            current_size = sum(len(s.split()) for s in current_chunk)
-        else:
-            current_chunk.append(sentence)
-            current_size += sentence_tokens
-    
-    # Add remaining chunk
-    if current_chunk:
-        chunk_text = " ".join(current_chunk)
+    if not n_sentences:
+        return chunks
+
+    # Prefix sums of sentence lengths: cum[j] - cum[i] is the token count of
+    # sentences[i:j], so each window end is one binary search instead of
+    # re-counting the sentences already in the chunk.
+    sizes = np.fromiter((len(s.split()) for s in sentences), dtype=np.int64, count=n_sentences)
+    cum = np.concatenate(([0], np.cumsum(sizes)))
+
+    start = 0
+    min_end = 1  # a chunk always takes at least one new sentence
+    while True:
+        # Largest end with cum[end] - cum[start] <= chunk_size_tokens
+        fit_end = int(np.searchsorted(cum, cum[start] + chunk_size_tokens, side="right")) - 1
+        end = min(max(fit_end, min_end), n_sentences)
+
         chunks.append(
-            {
-                "paper_id": paper["id"],
-                "title": paper["title"],
-                "abstract": paper["abstract"],
-                "chunk_text": chunk_text,
-                "start_token": len(chunks),
-                "end_token": len(chunks) + 1,
-                "chunking_strategy": "semantic",
-            }
+            ChunkRecord(
+                paper_id=paper_id,
+                title=title,
+                abstract=abstract,
+                chunk_text=" ".join(sentences[start:end]),
+                start_token=len(chunks),
+                end_token=len(chunks) + 1,
+                chunking_strategy="semantic",
+            )
         )
-    
+        if end >= n_sentences:
+            break
+
+        # Keep last few sentences for overlap
+        start = end - min(2, end - start)
+        min_end = end + 1
+
     return chunks
 
 
-def chunk_paper(paper: Dict, strategy: Literal["fixed_size", "sentence_based", "semantic"] = "fixed_size") -> List[Dict]:
+_STRATEGIES: Dict[str, Callable[[Dict], List[ChunkRecord]]] = {
+    "fixed_size": chunk_paper_fixed_size,
+    "sentence_based": chunk_paper_sentence_based,
+    "semantic": chunk_paper_semantic,
+}
+
+
+def _get_strategy(strategy: str) -> Callable[[Dict], List[ChunkRecord]]:
+    try:
+        return _STRATEGIES[strategy]
+    except KeyError:
+        raise ValueError(f"Unknown chunking strategy: {strategy}") from None
+
+
+def chunk_paper(paper: Dict, strategy: Literal["fixed_size", "sentence_based", "semantic"] = "fixed_size") -> List[ChunkRecord]:
     """
     Chunk the article using the specified strategy.
     
@@ -151,21 +176,43 @@ def chunk_paper(paper: Dict, strategy: Literal["fixed_size", "sentence_based", "
         strategy: Chunking strategy to use
     
     Returns:
-        List of chunk dictionaries
+        List of ChunkRecord
+    """
+    return _get_strategy(strategy)(paper)
+
+
+def iter_chunks(
+    papers: Iterable[Dict],
+    strategy: Literal["fixed_size", "sentence_based", "semantic"] = "fixed_size",
+) -> Iterator[ChunkRecord]:
     """
-    if strategy == "fixed_size":
-        return chunk_paper_fixed_size(paper)
-    elif strategy == "sentence_based":
-        return chunk_paper_sentence_based(paper)
-    elif strategy == "semantic":
-        return chunk_paper_semantic(paper)
-    else:
-        raise ValueError(f"Unknown chunking strategy: {strategy}")
+    Lazily yield chunks for all papers using the specified strategy.
+
+    Consumers such as index_chunks pull one batch at a time, so peak memory
+    is a batch of chunks rather than the whole corpus.
 
+    Args:
+        papers: Paper dictionaries (any iterable)
+        strategy: Chunking strategy to use
 
-def chunk_papers(papers: List[Dict], strategy: Literal["fixed_size", "sentence_based", "semantic"] = "fixed_size") -> List[Dict]:
+    Yields:
+        ChunkRecord for every chunk of every paper, in paper order
+    """
+    # Resolve the strategy once instead of dispatching on it for every paper
+    chunk_fn = _get_strategy(strategy)
+    for paper in papers:
+        yield from chunk_fn(paper)
+
+
+def chunk_papers(
+    papers: List[Dict],
+    strategy: Literal["fixed_size", "sentence_based", "semantic"] = "fixed_size",
+) -> List[ChunkRecord]:
     """
     Apply chunking to all papers using the specified strategy.
+
+    Materializes iter_chunks(); prefer iter_chunks when the chunks are
+    consumed once (e.g. streamed into index_chunks).
     
     Args:
         papers: List of paper dictionaries
@@ -174,7 +221,4 @@ def chunk_papers(papers: List[Dict], strategy: Literal["fixed_size", "sentence_b
     Returns:
         List of all chunks from all papers
     """
-    all_chunks: List[Dict] = []
-    for paper in papers:
-        all_chunks.extend(chunk_paper(paper, strategy=strategy))
-    return all_chunks
+    return list(iter_chunks(papers, strategy=strategy))
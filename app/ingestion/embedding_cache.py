@@ -0,0 +1,144 @@
+# app/ingestion/embedding_cache.py
+"""
+Content-addressed on-disk cache for embeddings.
+
+Vectors are keyed by (model, blake2b(text)), so re-running the indexer over
+unchanged chunks costs a few SQLite lookups instead of OpenAI round-trips.
+
+Vectors can be stored at reduced precision (fp16, or int8 with a per-vector
+scale) to shrink the cache; they are always returned as float32.
+"""
+
+import hashlib
+import sqlite3
+import threading
+from pathlib import Path
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+
+# SQLite limits the number of bound parameters per statement; stay well below it
+_MAX_PARAMS = 500
+
+PRECISIONS = ("fp32", "fp16", "int8")
+
+# Rows committed per write transaction; keeps the write lock short and bounds
+# what a crash can roll back
+_WRITE_BATCH_ROWS = 1000
+# Fold the WAL back into the main database after this many inserts
+_CHECKPOINT_EVERY = 10_000
+
+
+def _quantize_int8(vec: np.ndarray) -> tuple[np.ndarray, np.float32]:
+    """Symmetric max-abs quantization to int8 with a single per-vector scale."""
+    max_abs = float(np.abs(vec).max()) if vec.size else 0.0
+    scale = np.float32(max_abs / 127.0 if max_abs > 0 else 1.0)
+    q = np.round(vec / scale).astype(np.int8)
+    return q, scale
+
+
+def _encode(vec: np.ndarray, precision: str) -> bytes:
+    if precision == "fp32":
+        return vec.astype(np.float32).tobytes()
+    if precision == "fp16":
+        return vec.astype(np.float16).tobytes()
+    q, scale = _quantize_int8(vec)
+    return scale.tobytes() + q.tobytes()
+
+
+def _decode(blob: bytes, precision: str) -> np.ndarray:
+    if precision == "fp32":
+        return np.frombuffer(blob, dtype=np.float32)
+    if precision == "fp16":
+        return np.frombuffer(blob, dtype=np.float16).astype(np.float32)
+    scale = np.frombuffer(blob, dtype=np.float32, count=1)[0]
+    return np.frombuffer(blob, dtype=np.int8, offset=4).astype(np.float32) * scale
+
+
+class EmbeddingCache:
+    """
+    Thin wrapper around a single-table SQLite database.
+
+    The connection is shared across threads (Streamlit runs each session in its
+    own thread), so all access goes through a lock.
+    """
+
+    def __init__(self, path: str | Path, precision: str = "fp32"):
+        if precision not in PRECISIONS:
+            raise ValueError(f"Unknown embedding cache precision: {precision}")
+        self.path = Path(path)
+        self.precision = precision
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._inserts_since_checkpoint = 0
+        self.conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        # WAL lets readers proceed while a write is in progress
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS emb ("
+            "key BLOB PRIMARY KEY, dtype TEXT NOT NULL DEFAULT 'fp32', vec BLOB NOT NULL)"
+        )
+        self.conn.commit()
+
+    @staticmethod
+    def make_key(model: str, text: str) -> bytes:
+        """Build the cache key for a text embedded with the given model."""
+        h = hashlib.blake2b(digest_size=16)
+        h.update(model.encode("utf-8"))
+        h.update(b"\0")
+        h.update(text.encode("utf-8"))
+        return h.digest()
+
+    def get_many(self, keys: Sequence[bytes]) -> List[Optional[np.ndarray]]:
+        """
+        Look up vectors for the given keys.
+
+        Returns:
+            List aligned with `keys`; entries are None for cache misses
+        """
+        found = {}
+        with self._lock:
+            for i in range(0, len(keys), _MAX_PARAMS):
+                part = keys[i:i + _MAX_PARAMS]
+                placeholders = ",".join("?" * len(part))
+                rows = self.conn.execute(
+                    f"SELECT key, dtype, vec FROM emb WHERE key IN ({placeholders})", part
+                ).fetchall()
+                found.update((key, (dtype, vec)) for key, dtype, vec in rows)
+
+        # Rows are decoded with the precision they were written in, so changing
+        # the configured precision doesn't invalidate existing entries
+        return [
+            _decode(found[k][1], found[k][0]) if k in found else None
+            for k in keys
+        ]
+
+    def put_many(self, keys: Sequence[bytes], vectors: np.ndarray) -> None:
+        """
+        Store vectors (one row of `vectors` per key) at the cache's precision.
+
+        Rows are committed in small transactions, so a long indexing run that
+        crashes keeps everything written so far and can resume from the cache.
+        """
+        vectors = np.asarray(vectors, dtype=np.float32)
+        rows = [(k, self.precision, _encode(v, self.precision)) for k, v in zip(keys, vectors)]
+        with self._lock:
+            for i in range(0, len(rows), _WRITE_BATCH_ROWS):
+                # `with conn` commits the transaction (or rolls it back on error)
+                with self.conn:
+                    self.conn.executemany(
+                        "INSERT OR REPLACE INTO emb (key, dtype, vec) VALUES (?, ?, ?)",
+                        rows[i:i + _WRITE_BATCH_ROWS],
+                    )
+
+            self._inserts_since_checkpoint += len(rows)
+            if self._inserts_since_checkpoint >= _CHECKPOINT_EVERY:
+                # Keep the WAL file from growing without bound on long runs
+                self.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+                self._inserts_since_checkpoint = 0
+
+    def close(self) -> None:
+        with self._lock:
+            self.conn.close()
@@ -3,55 +3,181 @@
 OpenAI embedding utilities for generating embeddings without downloading models.
 """
 
+import json
 import os
-from typing import List
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from pathlib import Path
+from typing import List, Dict
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import numpy as np
 
+from app.config import config
+from app.ingestion.embedding_cache import EmbeddingCache
 
-def get_openai_embeddings(texts: List[str], model: str = "text-embedding-3-small") -> np.ndarray:
+try:
+    # orjson encodes/decodes float-heavy payloads several times faster than the stdlib
+    import orjson
+except ImportError:
+    orjson = None
+
+
+# OpenAI embeddings API accepts up to 2048 inputs per request
+# We'll batch if needed
+EMBED_BATCH_SIZE = 100  # Process in batches to avoid rate limits
+MAX_CONCURRENT_REQUESTS = 8  # Bound in-flight requests so we stay under rate limits
+
+
+def _make_session() -> requests.Session:
     """
-    Get embeddings from OpenAI API for a list of texts.
-    
-    Args:
-        texts: List of text strings to embed
-        model: OpenAI embedding model name (default: text-embedding-3-small)
-    
-    Returns:
-        numpy array of shape (len(texts), embedding_dim)
+    Shared HTTP session so batches reuse pooled keep-alive connections
+    instead of paying a TCP + TLS handshake per request.
+    """
+    session = requests.Session()
+    retry = Retry(
+        total=3,
+        backoff_factor=0.5,
+        status_forcelist=[429, 500, 502, 503, 504],
+        allowed_methods=frozenset({"POST"}),  # embedding calls are idempotent
+    )
+    adapter = HTTPAdapter(pool_connections=16, pool_maxsize=16, max_retries=retry)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+_SESSION = _make_session()
+
+
+@lru_cache(maxsize=1)
+def _get_cache() -> EmbeddingCache | None:
+    """Open the on-disk embedding cache once per process (None if disabled)."""
+    cache_path = config.embedding.cache_path
+    if not cache_path:
+        return None
+    path = Path(cache_path)
+    if not path.is_absolute():
+        project_root = Path(__file__).resolve().parents[2]
+        path = project_root / path
+    return EmbeddingCache(path, precision=config.embedding.cache_precision)
+
+
+def _dumps(payload: Dict) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return json.dumps(payload).encode("utf-8")
+
+
+def _loads(body: bytes) -> Dict:
+    if orjson is not None:
+        return orjson.loads(body)
+    return json.loads(body)
+
+
+def _get_embeddings_batch(batch: List[str], model: str, url: str, headers: Dict[str, str]) -> List[List[float]]:
+    """POST a single batch of texts to the embeddings endpoint."""
+    payload = {
+        "model": model,
+        "input": batch,
+    }
+
+    resp = _SESSION.post(url, data=_dumps(payload), headers=headers, timeout=60)
+    resp.raise_for_status()
+    # The response (100 x 1536 floats) dominates JSON cost, so decode it ourselves too
+    data = _loads(resp.content)
+
+    # Extract embeddings from response
+    return [item["embedding"] for item in data["data"]]
+
+
+def _fetch_openai_embeddings(texts: List[str], model: str) -> np.ndarray:
+    """
+    Call the OpenAI embeddings API for all texts (no caching).
+
+    Batches are sent concurrently (bounded by MAX_CONCURRENT_REQUESTS), so
+    total latency is roughly that of the slowest request instead of the sum.
     """
     api_key = os.getenv("OPENAI_API_KEY")
     if not api_key:
         raise RuntimeError("OPENAI_API_KEY is not set in the environment.")
-    
+
     base_url = os.getenv("OPENAI_BASE_URL", "https://api.openai.com/v1")
     url = f"{base_url}/embeddings"
-    
+
     headers = {
         "Authorization": f"Bearer {api_key}",
         "Content-Type": "application/json",
     }
-    
-    # OpenAI embeddings API accepts up to 2048 inputs per request
-    # We'll batch if needed
-    all_embeddings = []
-    batch_size = 100  # Process in batches to avoid rate limits
-    
-    for i in range(0, len(texts), batch_size):
-        batch = texts[i:i + batch_size]
-        
-        payload = {
-            "model": model,
-            "input": batch,
-        }
-        
-        resp = requests.post(url, json=payload, headers=headers, timeout=60)
-        resp.raise_for_status()
-        data = resp.json()
-        
-        # Extract embeddings from response
-        batch_embeddings = [item["embedding"] for item in data["data"]]
-        all_embeddings.extend(batch_embeddings)
-    
-    return np.array(all_embeddings, dtype=np.float32)
 
+    batches = [texts[i:i + EMBED_BATCH_SIZE] for i in range(0, len(texts), EMBED_BATCH_SIZE)]
+
+    if len(batches) <= 1:
+        # Single request (e.g. a query embedding) - no need for a thread pool
+        results = [_get_embeddings_batch(batch, model, url, headers) for batch in batches]
+    else:
+        workers = min(MAX_CONCURRENT_REQUESTS, len(batches))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            # map() preserves input order, so embeddings line up with texts
+            results = list(pool.map(lambda b: _get_embeddings_batch(b, model, url, headers), batches))
+
+    all_embeddings = [emb for batch_embeddings in results for emb in batch_embeddings]
+    return np.ascontiguousarray(all_embeddings, dtype=np.float32)
+
+
+def get_openai_embeddings(
+    texts: List[str],
+    model: str = "text-embedding-3-small",
+    use_cache: bool = True,
+) -> np.ndarray:
+    """
+    Get embeddings from OpenAI API for a list of texts.
+
+    Duplicate texts are embedded once and the vector is copied to every
+    position. Texts already present in the on-disk cache are served from it;
+    only the misses are sent to the API, and their vectors are written back.
+
+    Args:
+        texts: List of text strings to embed
+        model: OpenAI embedding model name (default: text-embedding-3-small)
+        use_cache: Read from / write to the on-disk embedding cache
+
+    Returns:
+        C-contiguous float32 numpy array of shape (len(texts), embedding_dim)
+    """
+    if not texts:
+        return _fetch_openai_embeddings(texts, model)
+
+    # Deduplicate by content hash: `inverse[i]` is the position of texts[i]
+    # among the unique texts (first occurrence order)
+    key_to_idx: Dict[bytes, int] = {}
+    unique_keys: List[bytes] = []
+    unique_texts: List[str] = []
+    inverse = []
+    for text in texts:
+        key = EmbeddingCache.make_key(model, text)
+        idx = key_to_idx.get(key)
+        if idx is None:
+            idx = key_to_idx[key] = len(unique_keys)
+            unique_keys.append(key)
+            unique_texts.append(text)
+        inverse.append(idx)
+
+    cache = _get_cache() if use_cache else None
+    if cache is None:
+        unique_vectors = _fetch_openai_embeddings(unique_texts, model)
+    else:
+        cached = cache.get_many(unique_keys)
+        miss_idx = [i for i, v in enumerate(cached) if v is None]
+
+        if miss_idx:
+            fetched = _fetch_openai_embeddings([unique_texts[i] for i in miss_idx], model)
+            cache.put_many([unique_keys[i] for i in miss_idx], fetched)
+            for i, vec in zip(miss_idx, fetched):
+                cached[i] = vec
+        unique_vectors = np.stack(cached)
+
+    # Fancy indexing scatters the unique vectors back and yields a new
+    # contiguous array even when there were no duplicates
+    return np.ascontiguousarray(unique_vectors[np.asarray(inverse)], dtype=np.float32)
@@ -1,6 +1,8 @@
 # app/ingestion/index_weaviate.py
 
-from typing import List, Dict
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from typing import Iterable, List, Sized
 import os
 
 import weaviate
@@ -9,6 +11,7 @@ from weaviate.classes.init import Auth
 from tqdm import tqdm
 
 from app.config import config
+from app.ingestion.chunking import ChunkRecord
 from app.ingestion.embeddings import get_openai_embeddings
 
 
@@ -82,10 +85,13 @@ def ensure_schema(client: weaviate.WeaviateClient) -> None:
 
 def index_chunks(
     client: weaviate.WeaviateClient,
-    chunks: List[Dict],
+    chunks: Iterable[ChunkRecord],
 ) -> None:
     """
     Embed and index all chunks into the Weaviate collection.
+
+    `chunks` may be a lazy iterator (e.g. from iter_chunks); it is consumed
+    one batch at a time, so only a couple of batches are held in memory.
     """
     w_conf = config.weaviate
     collection = client.collections.get(w_conf.class_name)
@@ -93,28 +99,74 @@ def index_chunks(
     print("Using OpenAI embeddings (text-embedding-3-small)...")
     embedding_model = os.getenv("OPENAI_EMBEDDING_MODEL", "text-embedding-3-small")
 
-    batch_size = w_conf.batch_size
-    total = len(chunks)
-    print(f"Indexing {total} chunks in batches of {batch_size}...")
-
-    for i in tqdm(range(0, total, batch_size)):
-        batch = chunks[i : i + batch_size]
-        texts = [c["chunk_text"] for c in batch]
-        vectors = get_openai_embeddings(texts, model=embedding_model)
-
-        with collection.batch.dynamic() as batcher:
+    # Embedding batches are sized for the OpenAI side; the Weaviate batcher
+    # regroups the objects into write requests on its own
+    batch_size = config.embedding.batch_size
+    total = len(chunks) if isinstance(chunks, Sized) else None
+    if total is None:
+        print(f"Indexing chunks in batches of {batch_size}...")
+    else:
+        print(f"Indexing {total} chunks in batches of {batch_size}...")
+
+    chunk_iter = iter(chunks)
+
+    def next_batch() -> List[ChunkRecord]:
+        return list(islice(chunk_iter, batch_size))
+
+    # Chunks whose text repeats within an embedding step (boilerplate,
+    # overlapping windows) are embedded once by get_openai_embeddings;
+    # repeats across steps are served by its on-disk cache
+    duplicate_texts = 0
+
+    def embed(batch: List[ChunkRecord]):
+        nonlocal duplicate_texts
+        texts = [c.chunk_text for c in batch]
+        duplicate_texts += len(texts) - len(set(texts))
+        return get_openai_embeddings(texts, model=embedding_model)
+
+    # Embedding (OpenAI) and writing (Weaviate) are both network-bound, so
+    # fetch the next batch's embeddings in the background while we write
+    # the current one: wall-clock ~ max(embed, write) instead of the sum.
+    # Writes go through the client's dynamic batcher, which groups objects
+    # into gRPC requests sized to the server's load and sends them from its
+    # own thread, so add_object rarely blocks on the network.
+    batch = next_batch()
+    with (
+        ThreadPoolExecutor(max_workers=1) as pool,
+        collection.batch.dynamic() as writer,
+        tqdm(total=total, unit="chunk") as progress,
+    ):
+        next_vectors = pool.submit(embed, batch) if batch else None
+        while batch:
+            vectors = next_vectors.result()
+            upcoming = next_batch()
+            if upcoming:
+                next_vectors = pool.submit(embed, upcoming)
+
+            # Each `vector` is a row view into the contiguous float32 batch
+            # array (no copy, no Python list of floats built here).
             for chunk, vector in zip(batch, vectors):
-                batcher.add_object(
+                writer.add_object(
                     properties={
-                        "paper_id": chunk["paper_id"],
-                        "title": chunk["title"],
-                        "abstract": chunk["abstract"],
-                        "chunk_text": chunk["chunk_text"],
-                        "start_token": chunk["start_token"],
-                        "end_token": chunk["end_token"],
-                        "chunking_strategy": chunk.get("chunking_strategy", "fixed_size"),
+                        "paper_id": chunk.paper_id,
+                        "title": chunk.title,
+                        "abstract": chunk.abstract,
+                        "chunk_text": chunk.chunk_text,
+                        "start_token": chunk.start_token,
+                        "end_token": chunk.end_token,
+                        "chunking_strategy": chunk.chunking_strategy,
                     },
                     vector=vector,
                 )
 
+            progress.update(len(batch))
+            batch = upcoming
+
+    # Leaving the batch context flushes everything still queued
+    failed = collection.batch.failed_objects
+    if failed:
+        print(f"Warning: {len(failed)} objects failed to index.")
+
+    if duplicate_texts:
+        print(f"Reused embeddings for {duplicate_texts} chunks with duplicate text.")
     print("Indexing complete.")
@@ -10,11 +10,51 @@ Implements 5 key metrics for evaluating RAG system performance:
 5. F1 Score - Harmonic mean of Precision and Recall
 """
 
-from typing import List, Dict, Set
+from functools import lru_cache
+from typing import AbstractSet, FrozenSet, List, Dict
+import re
+
 import numpy as np
 
 
-def precision_at_k(retrieved: List[str], relevant: Set[str], k: int) -> float:
+# Position discounts 1/log2(rank + 1) for ranks 1..4094, shared by DCG and IDCG
+_DISCOUNT = 1.0 / np.log2(np.arange(2, 4096))
+
+
+# Word tokenizer shared by queries and chunks (applied to lowercased text);
+# drops punctuation so "retrieval," and "retrieval" match
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+
+@lru_cache(maxsize=4096)
+def _words(text: str) -> FrozenSet[str]:
+    """
+    Word set of a text, memoized on the text itself.
+
+    Retrieved chunks (and repeated queries) are the same strings across
+    evaluations, so each is tokenized once without annotating the chunk dicts.
+    """
+    return frozenset(_WORD_RE.findall(text.lower()))
+
+
+def _chunk_words(chunk: Dict) -> FrozenSet[str]:
+    return _words(chunk.get("chunk_text", ""))
+
+
+def _discounts(n: int) -> np.ndarray:
+    """First n position discounts; computed on the fly only if n exceeds the table."""
+    if n <= len(_DISCOUNT):
+        return _DISCOUNT[:n]
+    return 1.0 / np.log2(np.arange(2, n + 2))
+
+
+def _hits(retrieved: List[str], relevant: AbstractSet[str], k: int) -> np.ndarray:
+    """Boolean array marking which of the top-K retrieved items are relevant."""
+    top_k = retrieved[:k]
+    return np.fromiter((item in relevant for item in top_k), dtype=bool, count=len(top_k))
+
+
+def precision_at_k(retrieved: List[str], relevant: AbstractSet[str], k: int) -> float:
     """
     Calculate Precision@K: fraction of top-K retrieved items that are relevant.
     
@@ -28,12 +68,10 @@ def precision_at_k(retrieved: List[str], relevant: Set[str], k: int) -> float:
     """
     if k == 0:
         return 0.0
-    top_k = retrieved[:k]
-    relevant_retrieved = sum(1 for item in top_k if item in relevant)
-    return relevant_retrieved / k
+    return float(_hits(retrieved, relevant, k).sum()) / k
 
 
-def recall_at_k(retrieved: List[str], relevant: Set[str], k: int) -> float:
+def recall_at_k(retrieved: List[str], relevant: AbstractSet[str], k: int) -> float:
     """
     Calculate Recall@K: fraction of relevant items found in top-K retrieved.
     
@@ -47,12 +85,10 @@ def recall_at_k(retrieved: List[str], relevant: Set[str], k: int) -> float:
     """
     if len(relevant) == 0:
         return 0.0
-    top_k = retrieved[:k]
-    relevant_retrieved = sum(1 for item in top_k if item in relevant)
-    return relevant_retrieved / len(relevant)
+    return float(_hits(retrieved, relevant, k).sum()) / len(relevant)
 
 
-def mean_reciprocal_rank(retrieved: List[str], relevant: Set[str]) -> float:
+def mean_reciprocal_rank(retrieved: List[str], relevant: AbstractSet[str]) -> float:
     """
     Calculate MRR: average reciprocal rank of first relevant item.
     
@@ -63,13 +99,12 @@ def mean_reciprocal_rank(retrieved: List[str], relevant: Set[str]) -> float:
     Returns:
         MRR score (0.0 to 1.0)
     """
-    for rank, item in enumerate(retrieved, start=1):
-        if item in relevant:
-            return 1.0 / rank
-    return 0.0
+    if not relevant:
+        return 0.0
+    return next((1.0 / rank for rank, item in enumerate(retrieved, start=1) if item in relevant), 0.0)
 
 
-def ndcg_at_k(retrieved: List[str], relevant: Set[str], k: int) -> float:
+def ndcg_at_k(retrieved: List[str], relevant: AbstractSet[str], k: int) -> float:
     """
     Calculate NDCG@K: normalized discounted cumulative gain at K.
     
@@ -85,21 +120,17 @@ def ndcg_at_k(retrieved: List[str], relevant: Set[str], k: int) -> float:
         return 0.0
     
     # DCG: sum of (relevance / log2(rank+1)) for top-K
-    dcg = 0.0
-    for rank, item in enumerate(retrieved[:k], start=1):
-        if item in relevant:
-            dcg += 1.0 / np.log2(rank + 1)
+    hits = _hits(retrieved, relevant, k)
+    dcg = float((hits * _discounts(len(hits))).sum())
     
     # IDCG: ideal DCG (all relevant items at top)
-    idcg = 0.0
     num_relevant = min(len(relevant), k)
-    for rank in range(1, num_relevant + 1):
-        idcg += 1.0 / np.log2(rank + 1)
+    idcg = float(_discounts(num_relevant).sum())
     
     return dcg / idcg if idcg > 0 else 0.0
 
 
-def f1_score_at_k(retrieved: List[str], relevant: Set[str], k: int) -> float:
+def f1_score_at_k(retrieved: List[str], relevant: AbstractSet[str], k: int) -> float:
     """
     Calculate F1@K: harmonic mean of Precision@K and Recall@K.
     
@@ -142,19 +173,18 @@ def evaluate_rag(
     """
     # Simulate relevance: chunks with high similarity (low distance) are considered relevant
     # In production, you'd have human-annotated ground truth
-    query_lower = query.lower()
-    query_words = set(query_lower.split())
+    query_words = _words(query)
     
-    # Create relevance set based on:
+    # Label each chunk and accumulate every metric in the same pass.
+    # Relevance is based on:
     # 1. Top scoring chunks (low distance = high similarity)
     # 2. Keyword overlap with query
-    relevant_ids = set()
-    chunk_ids = []
+    n_hits = 0
+    first_hit_rank = 0
+    dcg = 0.0
+    discount = _discounts(k)
     
     for i, chunk in enumerate(retrieved_chunks[:k]):
-        chunk_id = f"chunk_{i}"
-        chunk_ids.append(chunk_id)
-        
         # Consider relevant if:
         # - Score is in top 50% (lower distance = better)
         # - Or has significant keyword overlap
@@ -162,23 +192,32 @@ def evaluate_rag(
         if score is None:
             score = 1.0  # Default to worst score if missing
         
-        chunk_text_lower = chunk.get("chunk_text", "").lower()
-        chunk_words = set(chunk_text_lower.split())
-        
-        keyword_overlap = len(query_words & chunk_words) / max(len(query_words), 1)
+        # Tokenized once per chunk; reused when evaluated against other queries
+        keyword_overlap = len(query_words & _chunk_words(chunk)) / max(len(query_words), 1)
         
         # Threshold-based relevance (for demo purposes)
         if score < 0.5 or keyword_overlap > 0.3:
-            relevant_ids.add(chunk_id)
-    
-    # Calculate all metrics
-    metrics = {
-        "precision@k": precision_at_k(chunk_ids, relevant_ids, k),
-        "recall@k": recall_at_k(chunk_ids, relevant_ids, k),
-        "mrr": mean_reciprocal_rank(chunk_ids, relevant_ids),
-        "ndcg@k": ndcg_at_k(chunk_ids, relevant_ids, k),
-        "f1@k": f1_score_at_k(chunk_ids, relevant_ids, k),
-    }
+            n_hits += 1
+            if not first_hit_rank:
+                first_hit_rank = i + 1
+            dcg += discount[i]
     
-    return metrics
-
+    if k == 0:
+        return {"precision@k": 0.0, "recall@k": 0.0, "mrr": 0.0, "ndcg@k": 0.0, "f1@k": 0.0}
+    
+    # The relevant set is the retrieved chunks labelled relevant, so there
+    # are exactly n_hits relevant items (and at most k of them)
+    precision = n_hits / k
+    recall = 1.0 if n_hits else 0.0
+    mrr = 1.0 / first_hit_rank if first_hit_rank else 0.0
+    idcg = float(discount[:n_hits].sum())
+    ndcg = float(dcg) / idcg if idcg > 0 else 0.0
+    f1 = 2 * precision * recall / (precision + recall) if precision + recall > 0 else 0.0
+    
+    return {
+        "precision@k": precision,
+        "recall@k": recall,
+        "mrr": mrr,
+        "ndcg@k": ndcg,
+        "f1@k": f1,
+    }
@@ -1,11 +1,18 @@
 # app/rag/llm_client.py
-from typing import List, Dict
+from operator import itemgetter
+from typing import Iterator, List, Dict
+import json
 import os
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 from app.config import config
 
 
+_title_and_text = itemgetter("title", "chunk_text")
+
+
 class LLMClient:
     def __init__(self):
         llm_conf = config.llm
@@ -30,17 +37,35 @@ class LLMClient:
         # Allow overriding base URL (for Azure / proxies etc.), default is standard OpenAI
         self.base_url = os.getenv("OPENAI_BASE_URL", "https://api.openai.com/v1")
 
-    def generate_answer(self, query: str, contexts: List[Dict]) -> str:
-        """
-        Call the OpenAI-compatible /chat/completions endpoint via plain HTTP.
-        """
+        # Keep-alive session: only the first query pays the TCP + TLS handshake,
+        # and concurrent pipeline calls share the connection pool
+        self.session = requests.Session()
+        self.session.headers.update(
+            {
+                "Authorization": f"Bearer {api_key}",
+                "Content-Type": "application/json",
+            }
+        )
+        retry = Retry(
+            total=2,
+            backoff_factor=0.2,
+            status_forcelist=[429, 500, 502, 503, 504],
+            allowed_methods=frozenset({"POST"}),
+        )
+        adapter = HTTPAdapter(pool_connections=10, pool_maxsize=10, max_retries=retry)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def _build_payload(self, query: str, contexts: List[Dict]) -> Dict:
+        """Build the chat/completions request body for a query and its contexts."""
         if not contexts:
             context_block = "No relevant context chunks were retrieved."
         else:
-            context_block = "\n\n".join(
-                f"[{i+1}] Title: {c['title']}\n{c['chunk_text']}"
-                for i, c in enumerate(contexts)
-            )
+            # List comprehension (not a generator): join() materializes it anyway
+            context_block = "\n\n".join([
+                "[%d] Title: %s\n%s" % (i, *_title_and_text(c))
+                for i, c in enumerate(contexts, start=1)
+            ])
 
         system_prompt = (
             "You are a helpful ML research assistant. "
@@ -55,7 +80,7 @@ class LLMClient:
             f"Context:\n{context_block}"
         )
 
-        payload = {
+        return {
             "model": self.model,
             "temperature": self.temperature,
             "max_tokens": self.max_tokens,
@@ -65,14 +90,14 @@ class LLMClient:
             ],
         }
 
-        headers = {
-            "Authorization": f"Bearer {self.api_key}",
-            "Content-Type": "application/json",
-        }
-
+    def generate_answer(self, query: str, contexts: List[Dict]) -> str:
+        """
+        Call the OpenAI-compatible /chat/completions endpoint via plain HTTP.
+        """
+        payload = self._build_payload(query, contexts)
         url = f"{self.base_url}/chat/completions"
 
-        resp = requests.post(url, json=payload, headers=headers, timeout=60)
+        resp = self.session.post(url, json=payload, timeout=60)
         resp.raise_for_status()
         data = resp.json()
 
@@ -81,3 +106,33 @@ class LLMClient:
         except Exception as e:
             # Helpful error if the response structure is unexpected
             raise RuntimeError(f"Unexpected response from LLM API: {data}") from e
+
+    def generate_answer_stream(self, query: str, contexts: List[Dict]) -> Iterator[str]:
+        """
+        Like generate_answer, but yield the answer text as tokens arrive.
+
+        Uses the server-sent-events mode of /chat/completions (`stream: true`),
+        so the first words show up after ~the time-to-first-token instead of
+        after the whole completion. The generator works with st.write_stream.
+        """
+        payload = self._build_payload(query, contexts)
+        payload["stream"] = True
+        url = f"{self.base_url}/chat/completions"
+
+        with self.session.post(url, json=payload, timeout=60, stream=True) as resp:
+            resp.raise_for_status()
+            for line in resp.iter_lines():
+                # Events look like `data: {...}`; blank keep-alive lines are skipped
+                if not line.startswith(b"data:"):
+                    continue
+                data = line[len(b"data:"):].strip()
+                if data == b"[DONE]":
+                    break
+
+                event = json.loads(data)
+                choices = event.get("choices") or []
+                if not choices:
+                    continue
+                content = (choices[0].get("delta") or {}).get("content")
+                if content:
+                    yield content
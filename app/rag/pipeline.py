@@ -1,5 +1,7 @@
+import threading
+from collections import OrderedDict
 from dataclasses import dataclass
-from typing import List, Dict, Optional
+from typing import Iterator, List, Dict, Optional, Tuple
 
 from app.rag.llm_client import LLMClient
 from app.rag.retriever import Retriever
@@ -7,7 +9,7 @@ from app.rag.reranker import Reranker
 from app.rag.evaluation import evaluate_rag
 
 
-@dataclass
+@dataclass(slots=True)
 class RAGResult:
     query: str
     answer: str
@@ -16,6 +18,13 @@ class RAGResult:
     reranked_contexts: Optional[List[Dict]] = None  # After reranking
     evaluation_metrics: Optional[Dict[str, float]] = None
     reranking_comparison: Optional[Dict] = None
+    rerank_error: Optional[str] = None  # Set when reranking failed and retrieval order was kept
+
+
+# Recent queries whose retrieval results are kept (see RAGPipeline._search)
+RETRIEVE_CACHE_SIZE = 32
+# Chunks retrieved per query (at least top_k); the reranker reorders this pool
+CANDIDATE_POOL_SIZE = 20
 
 
 class RAGPipeline:
@@ -26,6 +35,7 @@ class RAGPipeline:
         reranker: Reranker | None = None,
         use_reranking: bool = False,
         use_evaluation: bool = False,
+        candidate_pool_size: int = CANDIDATE_POOL_SIZE,
     ):
         self.retriever = retriever or Retriever()
         self.llm = llm_client or LLMClient()
@@ -33,36 +43,63 @@ class RAGPipeline:
         self.reranker = reranker if reranker is not None else (Reranker() if use_reranking else None)
         self.use_reranking = use_reranking
         self.use_evaluation = use_evaluation
+        self.candidate_pool_size = candidate_pool_size
+        # query -> (k requested, retrieved chunks), most recently used last
+        self._retrieve_cache: OrderedDict[str, Tuple[int, List[Dict]]] = OrderedDict()
+        self._retrieve_cache_lock = threading.Lock()
 
-    def answer_query(
+    def clear_cache(self) -> None:
+        """Forget cached retrieval results (e.g. after re-indexing)."""
+        with self._retrieve_cache_lock:
+            self._retrieve_cache.clear()
+
+    def _search(self, query: str, top_k: int) -> List[Dict]:
+        """
+        Retrieve top_k chunks, reusing recent results for the same query.
+
+        Nearest-neighbour results are ordered by distance, so the top-k for a
+        smaller k is a prefix of a larger cached result.
+        """
+        with self._retrieve_cache_lock:
+            cached = self._retrieve_cache.get(query)
+            # Compare against the k that was requested: a small collection may
+            # return fewer chunks, and that result is still complete
+            if cached is not None and cached[0] >= top_k:
+                self._retrieve_cache.move_to_end(query)
+                return cached[1][:top_k]
+
+        chunks = self.retriever.retrieve(query, top_k=top_k)
+
+        with self._retrieve_cache_lock:
+            self._retrieve_cache[query] = (top_k, chunks)
+            self._retrieve_cache.move_to_end(query)
+            while len(self._retrieve_cache) > RETRIEVE_CACHE_SIZE:
+                self._retrieve_cache.popitem(last=False)
+        return chunks[:top_k]
+
+    def _retrieve(
         self,
         query: str,
-        top_k: int = 5,
-        use_reranking: bool | None = None,
-        use_evaluation: bool | None = None,
-    ) -> RAGResult:
+        top_k: int,
+        should_rerank: bool,
+    ) -> Tuple[List[Dict], List[Dict], Optional[Dict], Optional[str]]:
         """
-        Answer a query using RAG pipeline with optional reranking and evaluation.
-        
-        Args:
-            query: The user's question
-            top_k: Number of chunks to retrieve
-            use_reranking: Override default reranking setting
-            use_evaluation: Override default evaluation setting
-        
+        Retrieve contexts for a query and rerank them if requested.
+
+        The same candidate pool is fetched whether or not reranking is on, so
+        both views come from one (cached) retrieval. If reranking fails, the
+        bi-encoder order is kept rather than querying again.
+
         Returns:
-            RAGResult with answer, contexts, and optional metrics
+            (original_contexts, contexts, reranking_comparison, rerank_error);
+            the comparison is None when reranking is off or failed
         """
-        # Determine if reranking should be used
-        should_rerank = use_reranking if use_reranking is not None else self.use_reranking
-        
-        # Retrieve initial contexts (get more if reranking will be applied)
-        retrieve_k = top_k * 2 if should_rerank else top_k
-        original_contexts = self.retriever.retrieve(query, top_k=retrieve_k)
+        original_contexts = self._search(query, max(self.candidate_pool_size, top_k))
         
         # Apply reranking if enabled
         contexts = original_contexts
         reranking_comparison = None
+        rerank_error = None
         if should_rerank:
             # Create reranker on-demand if not already created
             if self.reranker is None:
@@ -75,23 +112,91 @@ class RAGPipeline:
                 # If reranker fails to load, fall back to original retrieval
                 print(f"Warning: Reranking failed: {e}")
                 print("Falling back to original retrieval results.")
-                reranking_comparison = None
-                contexts = original_contexts
-        
-        # Generate answer
-        answer = self.llm.generate_answer(query, contexts[:top_k])
-        
+                rerank_error = str(e)
+
+        return original_contexts, contexts, reranking_comparison, rerank_error
+
+    def _build_result(
+        self,
+        query: str,
+        top_k: int,
+        use_reranking: bool | None,
+        use_evaluation: bool | None,
+    ) -> RAGResult:
+        """
+        Retrieve, rerank and evaluate for a query; the answer is left empty.
+
+        Shared by answer_query and answer_query_stream, which fill in the answer.
+        """
+        should_rerank = use_reranking if use_reranking is not None else self.use_reranking
+        original_contexts, contexts, reranking_comparison, rerank_error = self._retrieve(
+            query, top_k, should_rerank
+        )
+
         # Evaluate if enabled
         evaluation_metrics = None
         if (use_evaluation if use_evaluation is not None else self.use_evaluation):
             evaluation_metrics = evaluate_rag(contexts[:top_k], query, k=top_k)
-        
+
         return RAGResult(
             query=query,
-            answer=answer,
+            answer="",
             contexts=contexts[:top_k],
             original_contexts=original_contexts[:top_k] if reranking_comparison else None,
             reranked_contexts=contexts[:top_k] if reranking_comparison else None,
             evaluation_metrics=evaluation_metrics,
             reranking_comparison=reranking_comparison,
+            rerank_error=rerank_error,
         )
+
+    def answer_query(
+        self,
+        query: str,
+        top_k: int = 5,
+        use_reranking: bool | None = None,
+        use_evaluation: bool | None = None,
+    ) -> RAGResult:
+        """
+        Answer a query using RAG pipeline with optional reranking and evaluation.
+        
+        Args:
+            query: The user's question
+            top_k: Number of chunks to retrieve
+            use_reranking: Override default reranking setting
+            use_evaluation: Override default evaluation setting
+        
+        Returns:
+            RAGResult with answer, contexts, and optional metrics
+        """
+        result = self._build_result(query, top_k, use_reranking, use_evaluation)
+        result.answer = self.llm.generate_answer(query, result.contexts)
+        return result
+
+    def answer_query_stream(
+        self,
+        query: str,
+        top_k: int = 5,
+        use_reranking: bool | None = None,
+        use_evaluation: bool | None = None,
+    ) -> Tuple[RAGResult, Iterator[str]]:
+        """
+        Like answer_query, but stream the answer instead of waiting for it.
+
+        Retrieval, reranking and evaluation run before returning; the LLM
+        request starts when the returned iterator is first consumed (e.g. by
+        st.write_stream).
+        
+        Returns:
+            (result, answer_stream) - result.answer is set (stripped, like
+            answer_query's) once answer_stream is exhausted
+        """
+        result = self._build_result(query, top_k, use_reranking, use_evaluation)
+        return result, self._stream_answer(result)
+
+    def _stream_answer(self, result: RAGResult) -> Iterator[str]:
+        """Yield answer deltas, then store the full answer on the result."""
+        parts = []
+        for delta in self.llm.generate_answer_stream(result.query, result.contexts):
+            parts.append(delta)
+            yield delta
+        result.answer = "".join(parts).strip()
@@ -12,12 +12,118 @@ This helps because:
 3. Typically improves precision of top results
 """
 
-from typing import List, Dict
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from pathlib import Path
+from typing import List, Dict, Tuple
 import numpy as np
+
+from app.config import config
 # Import CrossEncoder only when needed to avoid slow startup
 # from sentence_transformers import CrossEncoder
 
 
+# Pairs per forward pass; larger batches amortize tokenizer/kernel-launch overhead
+RERANK_BATCH_SIZE = 64
+
+
+@lru_cache(maxsize=None)
+def _load_cross_encoder(model_name: str):
+    """
+    Load a cross-encoder once per process.
+
+    Streamlit builds a pipeline (and so a Reranker) per session; sharing the
+    weights means only the first one pays the multi-second load.
+    """
+    import warnings
+    import logging
+    import os
+
+    # Suppress PyTorch warnings during model loading
+    warnings.filterwarnings("ignore")
+    os.environ["TOKENIZERS_PARALLELISM"] = "false"  # Suppress tokenizer warnings
+    logging.getLogger("transformers").setLevel(logging.ERROR)
+    logging.getLogger("sentence_transformers").setLevel(logging.ERROR)
+
+    # Import here to avoid slow startup
+    from sentence_transformers import CrossEncoder
+
+    import torch
+
+    # Prefer an accelerator: a top-20 rerank is tens of ms on GPU vs hundreds on CPU
+    if torch.cuda.is_available():
+        device = "cuda"
+    elif torch.backends.mps.is_available():
+        device = "mps"
+    else:
+        device = "cpu"
+
+    print(f"Loading reranker model {model_name} on {device}... (this may take a minute on first use)")
+    model = CrossEncoder(model_name, max_length=512, device=device)
+
+    if device == "cuda":
+        # FP16 on GPU: half the memory traffic and tensor-core matmuls.
+        # Scores can differ from FP32 in the 3rd-4th decimal, which
+        # doesn't matter for ranking.
+        model.model.half()
+    model.model.eval()
+    print("Reranker model loaded successfully.")
+    return model
+
+
+class _OnnxCrossEncoder:
+    """
+    Cross-encoder scored with ONNX Runtime (e.g. a dynamically quantized INT8
+    export), exposing the subset of CrossEncoder.predict() used here.
+
+    INT8 matmuls use the CPU's VNNI/AVX-512 paths and the file is ~4x smaller
+    than the FP32 weights, so CPU-only deployments rerank several times faster.
+    """
+
+    def __init__(self, onnx_path: str, max_length: int = 512):
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        # The export script saves the tokenizer next to the model file
+        self.tokenizer = AutoTokenizer.from_pretrained(str(Path(onnx_path).parent))
+        self.session = ort.InferenceSession(onnx_path, providers=["CPUExecutionProvider"])
+        self.input_names = {i.name for i in self.session.get_inputs()}
+        self.max_length = max_length
+
+    def predict(self, pairs, batch_size: int = 32, **_) -> np.ndarray:
+        scores = []
+        for i in range(0, len(pairs), batch_size):
+            queries, texts = zip(*pairs[i:i + batch_size])
+            encoded = self.tokenizer(
+                list(queries),
+                list(texts),
+                padding=True,
+                truncation=True,
+                max_length=self.max_length,
+                return_tensors="np",
+            )
+            feed = {k: v.astype(np.int64) for k, v in encoded.items() if k in self.input_names}
+            logits = self.session.run(None, feed)[0]
+            # Single-logit relevance head: raw logits, like the PyTorch model returns
+            scores.append(logits.reshape(len(queries), -1)[:, 0])
+        return np.concatenate(scores).astype(np.float32) if scores else np.empty(0, dtype=np.float32)
+
+
+@lru_cache(maxsize=None)
+def _load_onnx_cross_encoder(onnx_path: str) -> _OnnxCrossEncoder:
+    """Load an ONNX cross-encoder once per process."""
+    try:
+        import onnxruntime  # noqa: F401
+    except ImportError as e:
+        raise RuntimeError(
+            "RERANKER_ONNX_PATH is set but onnxruntime is not installed "
+            "(pip install onnxruntime)."
+        ) from e
+    print(f"Loading ONNX reranker model {onnx_path}...")
+    return _OnnxCrossEncoder(onnx_path)
+
+
 class Reranker:
     """
     Reranks retrieved chunks using a cross-encoder model.
@@ -26,37 +132,37 @@ class Reranker:
     but slower, so they're used to rerank a smaller set of candidates.
     """
     
-    def __init__(self, model_name: str = "cross-encoder/ms-marco-MiniLM-L-6-v2"):
+    def __init__(
+        self,
+        model_name: str = "cross-encoder/ms-marco-MiniLM-L-6-v2",
+        cache_size: int = 100_000,
+    ):
         """
         Initialize reranker with a cross-encoder model.
         
         Args:
             model_name: HuggingFace model name for cross-encoder
+            cache_size: Max (query, chunk) scores kept in the LRU score cache
         """
         self.model_name = model_name
         self.model = None  # Lazy load to avoid slow startup
         self._load_error = None
+        # LRU of cross-encoder scores keyed on (query, chunk_text): repeated
+        # queries / UI reruns skip the forward pass for known pairs. The full
+        # text is the key (the strings already exist), so pairs never collide
+        self._score_cache: OrderedDict[Tuple[str, str], float] = OrderedDict()
+        self._cache_size = cache_size
+        self._cache_lock = threading.Lock()
     
     def _ensure_model_loaded(self):
-        """Lazy load the model only when needed."""
+        """Lazy load the model only when needed (shared across Reranker instances)."""
         if self.model is None and self._load_error is None:
             try:
-                import warnings
-                import logging
-                import os
-                
-                # Suppress PyTorch warnings during model loading
-                warnings.filterwarnings("ignore")
-                os.environ["TOKENIZERS_PARALLELISM"] = "false"  # Suppress tokenizer warnings
-                logging.getLogger("transformers").setLevel(logging.ERROR)
-                logging.getLogger("sentence_transformers").setLevel(logging.ERROR)
-                
-                # Import here to avoid slow startup
-                from sentence_transformers import CrossEncoder
-                
-                print(f"Loading reranker model {self.model_name}... (this may take a minute on first use)")
-                self.model = CrossEncoder(self.model_name, max_length=512)
-                print("Reranker model loaded successfully.")
+                onnx_path = config.reranker.onnx_path
+                if onnx_path:
+                    self.model = _load_onnx_cross_encoder(onnx_path)
+                else:
+                    self.model = _load_cross_encoder(self.model_name)
             except Exception as e:
                 self._load_error = str(e)
                 raise RuntimeError(
@@ -67,6 +173,37 @@ class Reranker:
         elif self._load_error:
             raise RuntimeError(f"Reranker model failed to load: {self._load_error}")
     
+    def _score_pairs(self, pairs: List[Tuple[str, str]]) -> np.ndarray:
+        """Score (query, chunk_text) pairs, running the model only on cache misses."""
+        cache = self._score_cache
+        scores = np.empty(len(pairs), dtype=np.float32)
+
+        miss_idx = []
+        with self._cache_lock:
+            for i, key in enumerate(pairs):
+                cached = cache.get(key)
+                if cached is None:
+                    miss_idx.append(i)
+                else:
+                    cache.move_to_end(key)
+                    scores[i] = cached
+
+        if miss_idx:
+            miss_scores = self.model.predict(
+                [pairs[i] for i in miss_idx],
+                batch_size=RERANK_BATCH_SIZE,
+                show_progress_bar=False,
+                convert_to_numpy=True,
+            )
+            with self._cache_lock:
+                for i, score in zip(miss_idx, miss_scores):
+                    scores[i] = score
+                    cache[pairs[i]] = float(score)
+                while len(cache) > self._cache_size:
+                    cache.popitem(last=False)
+
+        return scores
+
     def rerank(
         self,
         query: str,
@@ -93,25 +230,21 @@ class Reranker:
         # Prepare query-chunk pairs for cross-encoder
         pairs = [(query, chunk.get("chunk_text", "")) for chunk in chunks]
         
-        # Get relevance scores from cross-encoder
-        scores = self.model.predict(pairs)
-        
-        # Add rerank scores and sort by them (higher = more relevant)
-        reranked = []
-        for idx, (chunk, score) in enumerate(zip(chunks, scores)):
-            chunk_copy = chunk.copy()
-            chunk_copy["rerank_score"] = float(score)
-            chunk_copy["original_rank"] = idx + 1
-            reranked.append(chunk_copy)
+        # Get relevance scores from cross-encoder (only for pairs not cached)
+        scores = self._score_pairs(pairs)
         
-        # Sort by rerank score (descending)
-        reranked.sort(key=lambda x: x["rerank_score"], reverse=True)
+        # Sort by rerank score (descending); stable so ties keep retrieval order
+        order = np.argsort(-scores, kind="stable")
         
-        # Return top_k if specified
+        # Return top_k if specified - only the returned chunks are copied
         if top_k is not None:
-            return reranked[:top_k]
+            order = order[:top_k]
         
-        return reranked
+        # Add rerank scores (higher = more relevant) and original positions
+        return [
+            {**chunks[i], "rerank_score": float(scores[i]), "original_rank": int(i) + 1}
+            for i in order
+        ]
     
     def compare_retrieval(
         self,
@@ -131,18 +264,17 @@ class Reranker:
         original_top = original_chunks[:top_k]
         reranked_top = reranked[:top_k]
         
-        # Count how many top results changed position
-        original_ids = [id(c) for c in original_top]
-        reranked_ids = [id(c) for c in reranked_top]
+        # Count how many top results changed position. rerank() returns copies,
+        # so identity can't be used; original_rank is the stable input index
         position_changes = sum(
-            1 for i, chunk_id in enumerate(reranked_ids)
-            if chunk_id not in original_ids[:i+1]
+            1 for i, chunk in enumerate(reranked_top)
+            if chunk["original_rank"] - 1 != i
         )
         
         return {
             "original": original_top,
             "reranked": reranked_top,
             "position_changes": position_changes,
-            "avg_rerank_score": np.mean([c["rerank_score"] for c in reranked_top]) if reranked_top else 0.0,
+            "avg_rerank_score": float(np.mean([c["rerank_score"] for c in reranked_top])) if reranked_top else 0.0,
         }
 
@@ -1,27 +1,49 @@
+from functools import lru_cache
 from typing import List, Dict
 import os
 
 import numpy as np
 import weaviate
+from weaviate.classes.query import MetadataQuery
 
 from app.config import config
 from app.ingestion.index_weaviate import get_weaviate_client
 from app.ingestion.embeddings import get_openai_embeddings
 
 
+@lru_cache(maxsize=1024)
+def _embed_query(model: str, query: str) -> np.ndarray:
+    """Embed a (normalized) query once per process; repeats are a dict lookup."""
+    query_vec = get_openai_embeddings([query], model=model)[0].astype(np.float32)
+    # L2-normalize once here, so the cached vector is what gets sent; OpenAI
+    # embeddings are already ~unit length, other models may not be
+    norm = np.linalg.norm(query_vec)
+    if norm > 0:
+        query_vec /= norm
+    query_vec.setflags(write=False)  # shared by every caller of the cache
+    return query_vec
+
+
 class Retriever:
     def __init__(self, client: weaviate.WeaviateClient | None = None):
         self.client = client or get_weaviate_client()
         self.collection = self.client.collections.get(config.weaviate.class_name)
         self.embedding_model = os.getenv("OPENAI_EMBEDDING_MODEL", "text-embedding-3-small")
 
+    def _embed(self, query: str) -> np.ndarray:
+        """Unit-length query embedding (read-only; shared with the LRU cache)."""
+        # Collapse whitespace so trivially different spellings share a cache entry
+        normalized = " ".join(query.split())
+        return _embed_query(self.embedding_model, normalized)
+
     def retrieve(self, query: str, top_k: int = 5) -> List[Dict]:
-        # Get embedding from OpenAI API
-        query_embeddings = get_openai_embeddings([query], model=self.embedding_model)
-        query_vec = query_embeddings[0].astype(np.float32)
+        # Get embedding from OpenAI API (cached for repeated queries)
+        query_vec = self._embed(query)
         results = self.collection.query.near_vector(
             near_vector=query_vec.tolist(),
             limit=top_k,
+            # Distances aren't returned unless requested; they feed 'score'
+            return_metadata=MetadataQuery(distance=True),
         )
 
         chunks: List[Dict] = []
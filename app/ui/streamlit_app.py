@@ -1,4 +1,7 @@
 import sys
+import threading
+import time
+from collections import Counter, OrderedDict
 from pathlib import Path
 
 # Add project root to Python path so we can import 'app'
@@ -6,21 +9,76 @@ project_root = Path(__file__).resolve().parents[2]  # app/ui/streamlit_app.py ->
 if str(project_root) not in sys.path:
     sys.path.insert(0, str(project_root))
 
+import numpy as np
+import pyarrow as pa
 import streamlit as st
-import pandas as pd
 
-from app.rag.pipeline import RAGPipeline
+from app.rag.pipeline import RAGPipeline, RAGResult
 
 
-def init_pipeline(use_reranking: bool = False, use_evaluation: bool = False) -> RAGPipeline:
-    """Initialize pipeline with optional features."""
-    key = f"pipeline_rerank_{use_reranking}_eval_{use_evaluation}"
-    if key not in st.session_state:
-        st.session_state[key] = RAGPipeline(
-            use_reranking=use_reranking,
-            use_evaluation=use_evaluation,
-        )
-    return st.session_state[key]
+@st.cache_resource(show_spinner=False)
+def _load_style_html() -> str:
+    """
+    Read the page CSS (a static file next to this script) once per process.
+
+    Streamlit re-executes this script on every rerun, so a plain module-level
+    read would hit the disk each time.
+    """
+    css = (Path(__file__).parent / "style.css").read_text(encoding="utf-8")
+    return f"<style>{css}</style>"
+
+
+@st.cache_resource(show_spinner=False)
+def get_pipeline() -> RAGPipeline:
+    """
+    Build the pipeline once, shared by all sessions and reruns.
+
+    Reranking and evaluation are chosen per query (answer_query_stream
+    kwargs), so flipping a sidebar checkbox never builds a new pipeline;
+    the reranker model is loaded the first time it is needed.
+    """
+    return RAGPipeline()
+
+
+# Finished answers kept for repeat questions: (query, top_k, flags) -> result
+ANSWER_CACHE_TTL = 600  # seconds
+ANSWER_CACHE_SIZE = 64
+
+
+@st.cache_resource(show_spinner=False)
+def _answer_cache() -> tuple[threading.Lock, OrderedDict]:
+    """
+    Process-wide LRU of finished answers, shared by all sessions.
+
+    Kept outside st.cache_data so the answer can be streamed into the page
+    (outside the retrieval spinner) and only stored once it is complete.
+    """
+    return threading.Lock(), OrderedDict()
+
+
+def _get_cached_answer(key: tuple) -> RAGResult | None:
+    """Return the cached result for key, or None if missing or expired."""
+    lock, cache = _answer_cache()
+    with lock:
+        entry = cache.get(key)
+        if entry is None:
+            return None
+        stored_at, result = entry
+        if time.monotonic() - stored_at > ANSWER_CACHE_TTL:
+            del cache[key]
+            return None
+        cache.move_to_end(key)
+        return result
+
+
+def _store_answer(key: tuple, result: RAGResult) -> None:
+    """Cache a finished result, evicting the least recently used entry."""
+    lock, cache = _answer_cache()
+    with lock:
+        cache[key] = (time.monotonic(), result)
+        cache.move_to_end(key)
+        while len(cache) > ANSWER_CACHE_SIZE:
+            cache.popitem(last=False)
 
 
 def render_sidebar():
@@ -65,11 +123,8 @@ def render_sidebar():
     return use_reranking, use_evaluation, top_k
 
 
-def render_evaluation_metrics(metrics: dict):
-    """Render evaluation metrics in a nice format."""
-    st.subheader("📊 RAG Evaluation Metrics")
-    st.markdown(
-        """
+# Static text for the evaluation tab, built once at import instead of per rerun
+_METRICS_INTRO_MD = """
         These metrics help us understand how well our retrieval system is performing:
         - **Precision@K**: Fraction of retrieved items that are relevant
         - **Recall@K**: Fraction of relevant items that were retrieved
@@ -77,25 +132,8 @@ def render_evaluation_metrics(metrics: dict):
         - **NDCG@K**: Normalized Discounted Cumulative Gain (ranking quality)
         - **F1@K**: Harmonic mean of Precision and Recall
         """
-    )
-    
-    # Create metrics display
-    col1, col2, col3, col4, col5 = st.columns(5)
-    
-    with col1:
-        st.metric("Precision@K", f"{metrics.get('precision@k', 0):.3f}")
-    with col2:
-        st.metric("Recall@K", f"{metrics.get('recall@k', 0):.3f}")
-    with col3:
-        st.metric("MRR", f"{metrics.get('mrr', 0):.3f}")
-    with col4:
-        st.metric("NDCG@K", f"{metrics.get('ndcg@k', 0):.3f}")
-    with col5:
-        st.metric("F1@K", f"{metrics.get('f1@k', 0):.3f}")
-    
-    # Show explanation
-    with st.expander("📖 Understanding the Metrics"):
-        st.markdown("""
+
+_METRICS_EXPLANATION_MD = """
         **Precision@K**: Measures how many of the top-K results are actually relevant.
         - High precision = fewer irrelevant results
         
@@ -110,7 +148,69 @@ def render_evaluation_metrics(metrics: dict):
         
         **F1@K**: Balanced measure combining precision and recall.
         - Good overall performance indicator
-        """)
+        """
+
+# (label, metrics key) in display order
+_METRIC_LABELS = (
+    ("Precision@K", "precision@k"),
+    ("Recall@K", "recall@k"),
+    ("MRR", "mrr"),
+    ("NDCG@K", "ndcg@k"),
+    ("F1@K", "f1@k"),
+)
+
+
+def render_evaluation_metrics(metrics: dict):
+    """Render evaluation metrics in a nice format."""
+    st.subheader("📊 RAG Evaluation Metrics")
+    st.markdown(_METRICS_INTRO_MD)
+    
+    # Create metrics display
+    for col, (label, key) in zip(st.columns(len(_METRIC_LABELS)), _METRIC_LABELS):
+        col.metric(label, f"{metrics.get(key, 0):.3f}")
+    
+    # Show explanation
+    with st.expander("📖 Understanding the Metrics"):
+        st.markdown(_METRICS_EXPLANATION_MD)
+
+
+def _trunc(text: str | None, n: int = 50) -> str:
+    """Shorten a title for table/label display."""
+    return (text or "")[:n] + "..."
+
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def _build_rerank_table(original_rows: tuple, reranked_rows: tuple) -> pa.Table:
+    """
+    Build the before/after reranking table.
+
+    Args:
+        original_rows: (title, score) per original chunk
+        reranked_rows: (title, rerank_score, original_rank) per reranked chunk
+    """
+    orig_titles, orig_scores = zip(*original_rows) if original_rows else ((), ())
+    rerank_titles, rerank_scores, original_ranks = zip(*reranked_rows) if reranked_rows else ((), (), ())
+    n_rows = min(len(orig_titles), len(rerank_titles))
+    ranks = range(1, n_rows + 1)
+
+    # Missing scores (None) become NaN in the float array, then 0.0
+    orig_scores = np.nan_to_num(np.array(orig_scores[:n_rows], dtype=float))
+    rerank_scores = np.nan_to_num(np.array(rerank_scores[:n_rows], dtype=float))
+
+    # Typed Arrow columns go to the browser as-is: no pandas DataFrame and no
+    # per-cell type inference when Streamlit serializes the table
+    return pa.table({
+        "Rank": pa.array(list(ranks), type=pa.int32()),
+        "Original Title": pa.array([_trunc(t) for t in orig_titles[:n_rows]], type=pa.string()),
+        "Original Score": pa.array(orig_scores, type=pa.float32()),
+        "Reranked Title": pa.array([_trunc(t) for t in rerank_titles[:n_rows]], type=pa.string()),
+        "Rerank Score": pa.array(rerank_scores, type=pa.float32()),
+        # The reranker records each chunk's pre-rerank position as original_rank
+        "Moved": pa.array(
+            ["✅" if (orig or i) != i else "➡️" for i, orig in zip(ranks, original_ranks)],
+            type=pa.string(),
+        ),
+    })
 
 
 def render_reranking_comparison(comparison: dict):
@@ -146,26 +246,24 @@ def render_reranking_comparison(comparison: dict):
     if original and reranked:
         st.markdown("#### Before vs After Reranking")
         
-        comparison_data = []
-        for i, (orig, rerank) in enumerate(zip(original[:5], reranked[:5]), 1):
-            # Safely handle None values - .get() returns None if key exists with None value
-            orig_score_val = orig.get('score')
-            orig_score = float(orig_score_val) if orig_score_val is not None else 0.0
-            
-            rerank_score_val = rerank.get('rerank_score')
-            rerank_score = float(rerank_score_val) if rerank_score_val is not None else 0.0
-            
-            comparison_data.append({
-                "Rank": i,
-                "Original Title": (orig.get("title") or "")[:50] + "...",
-                "Original Score": f"{orig_score:.4f}",
-                "Reranked Title": (rerank.get("title") or "")[:50] + "...",
-                "Rerank Score": f"{rerank_score:.3f}",
-                "Moved": "✅" if id(orig) != id(rerank) else "➡️"
-            })
-        
-        df = pd.DataFrame(comparison_data)
-        st.dataframe(df, use_container_width=True, hide_index=True)
+        # Pass only the fields the table shows, as hashable tuples, so the
+        # cached DataFrame is reused on reruns that don't change the result
+        table = _build_rerank_table(
+            tuple((orig.get("title"), orig.get("score")) for orig in original[:5]),
+            tuple(
+                (rerank.get("title"), rerank.get("rerank_score"), rerank.get("original_rank"))
+                for rerank in reranked[:5]
+            ),
+        )
+        st.dataframe(
+            table,
+            use_container_width=True,
+            hide_index=True,
+            column_config={
+                "Original Score": st.column_config.NumberColumn(format="%.4f"),
+                "Rerank Score": st.column_config.NumberColumn(format="%.3f"),
+            },
+        )
         
         # Show explanation
         with st.expander("💡 How Reranking Works"):
@@ -191,18 +289,15 @@ def render_chunking_info(contexts: list):
     )
     
     # Analyze chunks to show strategy
-    strategies = {}
-    for ctx in contexts:
-        strategy = ctx.get("chunking_strategy", "fixed_size")
-        strategies[strategy] = strategies.get(strategy, 0) + 1
+    strategies = Counter(ctx.get("chunking_strategy", "fixed_size") for ctx in contexts)
     
     if strategies:
         st.markdown("#### Current Chunks by Strategy")
-        strategy_df = pd.DataFrame([
-            {"Strategy": k, "Count": v}
-            for k, v in strategies.items()
-        ])
-        st.dataframe(strategy_df, use_container_width=True, hide_index=True)
+        strategy_table = pa.table({
+            "Strategy": pa.array(list(strategies.keys()), type=pa.string()),
+            "Count": pa.array(list(strategies.values()), type=pa.int32()),
+        })
+        st.dataframe(strategy_table, use_container_width=True, hide_index=True)
     
     # Show chunking strategies comparison
     with st.expander("📚 Chunking Strategies Explained"):
@@ -229,6 +324,82 @@ def render_chunking_info(contexts: list):
         """)
 
 
+@st.fragment
+def render_results_tabs(result):
+    """
+    Render the metrics / reranking / chunking / chunks tabs for a result.
+
+    Runs as a fragment: interacting with widgets inside the tabs reruns only
+    this function, not the search and answer sections above it.
+    """
+    # Create tabs for different views
+    tab1, tab2, tab3, tab4 = st.tabs([
+        "📊 Evaluation Metrics",
+        "🔄 Reranking",
+        "✂️ Chunking Info",
+        "📄 Retrieved Chunks"
+    ])
+
+    with tab1:
+        if result.evaluation_metrics:
+            render_evaluation_metrics(result.evaluation_metrics)
+        else:
+            st.info("Enable 'Evaluation' in sidebar to see metrics.")
+
+    with tab2:
+        if result.reranking_comparison:
+            render_reranking_comparison(result.reranking_comparison)
+        elif result.rerank_error:
+            st.info("Reranking failed for this query; results are in retrieval order.")
+        else:
+            st.info("Enable 'Reranking' in sidebar to see comparison.")
+
+    with tab3:
+        render_chunking_info(result.contexts)
+
+    with tab4:
+        st.subheader("📄 Retrieved Chunks")
+        st.markdown(
+            "These are the chunks retrieved from the vector database. "
+            "Each chunk contains relevant context from research papers."
+        )
+        
+        if not result.contexts:
+            st.info("No chunks were retrieved.")
+            return
+
+        # Only the selected chunk is rendered (and sent to the browser);
+        # switching chunks reruns just this fragment
+        contexts = result.contexts
+        idx = st.selectbox(
+            "Chunk",
+            range(len(contexts)),
+            format_func=lambda i: f"Chunk {i + 1} · {_trunc(contexts[i].get('title') or 'Unknown', 60)}",
+            key="selected_chunk",
+        )
+        ctx = contexts[min(idx, len(contexts) - 1)]
+
+        col1, col2 = st.columns(2)
+        with col1:
+            st.markdown(f"**Paper ID:** {ctx.get('paper_id', 'N/A')}")
+            st.markdown(f"**Title:** {ctx.get('title', 'N/A')}")
+        with col2:
+            st.markdown(f"**Token range:** {ctx.get('start_token', 0)} – {ctx.get('end_token', 0)}")
+            score = ctx.get("score")
+            if score is not None:
+                st.markdown(f"**Similarity Score:** {score:.4f}")
+            rerank_score = ctx.get("rerank_score")
+            if rerank_score is not None:
+                st.markdown(f"**Rerank Score:** {rerank_score:.3f}")
+            chunking_strategy = ctx.get("chunking_strategy")
+            if chunking_strategy:
+                st.markdown(f"**Strategy:** {chunking_strategy}")
+        
+        st.divider()
+        st.markdown("**Chunk Text:**")
+        st.markdown(ctx.get("chunk_text", ""))
+
+
 def main():
     st.set_page_config(
         page_title="ML Research Assistant - Advanced RAG",
@@ -237,7 +408,7 @@ def main():
     )
 
     use_reranking, use_evaluation, top_k = render_sidebar()
-    pipeline = init_pipeline(use_reranking, use_evaluation)
+    pipeline = get_pipeline()
 
     st.title("🔍 ML Research Assistant")
     st.markdown(
@@ -256,130 +427,83 @@ def main():
     )
     
     # Simple search button below the text box - centered and properly sized
-    st.markdown("""
-    <style>
-    /* Style search button to be simple, properly sized, and readable */
-    .stButton > button {
-        width: 160px !important;
-        min-height: 36px !important;
-        height: auto !important;
-        padding: 0.4rem 1.2rem !important;
-        font-size: 0.95rem !important;
-        font-weight: 500 !important;
-        border-radius: 6px !important;
-    }
-    </style>
-    """, unsafe_allow_html=True)
+    # Streamlit drops elements a rerun doesn't emit, so the style tag is still
+    # emitted every run; only reading and wrapping the CSS is cached
+    st.markdown(_load_style_html(), unsafe_allow_html=True)
     
     # Center the button below the text input
     col1, col2, col3 = st.columns([1, 1.5, 1])
     with col2:
         search_clicked = st.button("🔍 Search", type="primary", use_container_width=False, key="search_btn")
     
+    answered_now = False
     if search_clicked:
         if not query.strip():
             st.warning("Please enter a question.")
         else:
             # Show appropriate spinner message
-            spinner_msg = "🔍 Retrieving and generating answer..."
+            spinner_msg = "🔍 Retrieving context..."
             if use_reranking:
-                spinner_msg = "🔍 Retrieving, reranking, and generating answer... (reranking may take 30-60s on first use)"
+                spinner_msg = "🔍 Retrieving and reranking context... (reranking may take 30-60s on first use)"
             elif use_evaluation:
-                spinner_msg = "🔍 Retrieving, evaluating, and generating answer..."
+                spinner_msg = "🔍 Retrieving and evaluating context..."
+            
+            # Main content area
+            st.divider()
             
-            with st.spinner(spinner_msg):
+            # Answer section: streamed on a cache miss, replayed on a hit
+            st.subheader("💬 Answer")
+            cache_key = (query, top_k, use_reranking, use_evaluation)
+            result = _get_cached_answer(cache_key)
+            if result is not None:
+                st.markdown(result.answer)
+                answered_now = True
+            else:
                 try:
-                    result = pipeline.answer_query(
-                        query,
-                        top_k=top_k,
-                        use_reranking=use_reranking,
-                        use_evaluation=use_evaluation,
-                    )
-                    st.session_state["last_result"] = result
-                except RuntimeError as e:
-                    if "reranker" in str(e).lower() or "rerank" in str(e).lower():
-                        st.error(f"⚠️ Reranking failed: {str(e)}\n\n**Tip:** Try disabling reranking in the sidebar settings for faster responses.")
-                        # Fall back to non-reranked result
-                        try:
-                            result = pipeline.answer_query(
-                                query,
-                                top_k=top_k,
-                                use_reranking=False,
-                                use_evaluation=use_evaluation,
-                            )
-                            st.session_state["last_result"] = result
-                            st.info("✅ Showing results without reranking.")
-                        except Exception as e2:
-                            st.error(f"Error: {e2}")
-                    else:
-                        st.error(f"Error: {e}")
+                    # Only retrieval (and reranking/evaluation) runs under the
+                    # spinner; the answer streams in below it as it is generated
+                    with st.spinner(spinner_msg):
+                        result, answer_stream = pipeline.answer_query_stream(
+                            query,
+                            top_k=top_k,
+                            use_reranking=use_reranking,
+                            use_evaluation=use_evaluation,
+                        )
+                    # Render tokens as they arrive; the pipeline stores the full
+                    # answer on the result once the stream is exhausted
+                    st.write_stream(answer_stream)
+                    answered_now = True
                 except Exception as e:
                     st.error(f"An error occurred: {e}")
+                # Reranking failures don't raise: the pipeline keeps the retrieval
+                # order and reports them on the result (shown below). Such results
+                # aren't cached, so asking again retries the reranker.
+                if answered_now and not result.rerank_error:
+                    _store_answer(cache_key, result)
+            if not answered_now:
+                return
+            st.session_state["last_result"] = result
 
     result = st.session_state.get("last_result")
     if not result:
         st.info("👆 Enter a question and click 'Search & Answer' to see results.")
         return
 
-    # Main content area
-    st.divider()
-    
-    # Answer section
-    st.subheader("💬 Answer")
-    st.markdown(result.answer)
+    if not answered_now:
+        # Main content area
+        st.divider()
+        
+        # Answer section
+        st.subheader("💬 Answer")
+        st.markdown(result.answer)
     st.caption("Model-generated answer from retrieved context chunks.")
-
-    # Create tabs for different views
-    tab1, tab2, tab3, tab4 = st.tabs([
-        "📊 Evaluation Metrics",
-        "🔄 Reranking",
-        "✂️ Chunking Info",
-        "📄 Retrieved Chunks"
-    ])
-
-    with tab1:
-        if result.evaluation_metrics:
-            render_evaluation_metrics(result.evaluation_metrics)
-        else:
-            st.info("Enable 'Evaluation' in sidebar to see metrics.")
-
-    with tab2:
-        if result.reranking_comparison:
-            render_reranking_comparison(result.reranking_comparison)
-        else:
-            st.info("Enable 'Reranking' in sidebar to see comparison.")
-
-    with tab3:
-        render_chunking_info(result.contexts)
-
-    with tab4:
-        st.subheader("📄 Retrieved Chunks")
-        st.markdown(
-            "These are the chunks retrieved from the vector database. "
-            "Each chunk contains relevant context from research papers."
+    if result.rerank_error:
+        st.warning(
+            f"⚠️ Reranking failed, showing results without reranking: {result.rerank_error}\n\n"
+            "**Tip:** Try disabling reranking in the sidebar settings for faster responses."
         )
-        
-        for i, ctx in enumerate(result.contexts, start=1):
-            with st.expander(f"Chunk {i} · {ctx.get('title', 'Unknown')[:60]}..."):
-                col1, col2 = st.columns(2)
-                with col1:
-                    st.markdown(f"**Paper ID:** {ctx.get('paper_id', 'N/A')}")
-                    st.markdown(f"**Title:** {ctx.get('title', 'N/A')}")
-                with col2:
-                    st.markdown(f"**Token range:** {ctx.get('start_token', 0)} – {ctx.get('end_token', 0)}")
-                    score = ctx.get("score")
-                    if score is not None:
-                        st.markdown(f"**Similarity Score:** {score:.4f}")
-                    rerank_score = ctx.get("rerank_score")
-                    if rerank_score is not None:
-                        st.markdown(f"**Rerank Score:** {rerank_score:.3f}")
-                    chunking_strategy = ctx.get("chunking_strategy")
-                    if chunking_strategy:
-                        st.markdown(f"**Strategy:** {chunking_strategy}")
-                
-                st.divider()
-                st.markdown("**Chunk Text:**")
-                st.markdown(ctx.get("chunk_text", ""))
+
+    render_results_tabs(result)
 
 
 if __name__ == "__main__":
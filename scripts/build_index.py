@@ -6,7 +6,12 @@ Usage:
     (Must be run from project root directory)
 """
 
+import multiprocessing
 import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from itertools import islice
 from pathlib import Path
 
 # Add project root to Python path so we can import 'app'
@@ -14,7 +19,7 @@ project_root = Path(__file__).parent.parent
 if str(project_root) not in sys.path:
     sys.path.insert(0, str(project_root))
 
-from app.data.load_arxiv import load_arxiv_papers
+from app.data.load_arxiv import iter_arxiv_papers
 from app.ingestion.chunking import chunk_papers
 from app.config import config
 from app.ingestion.index_weaviate import (
@@ -24,30 +29,74 @@ from app.ingestion.index_weaviate import (
 )
 
 
-def main():
-    client = get_weaviate_client()
-    ensure_schema(client)
+def _chunk_batch(batch, strategy):
+    """Chunk one batch of papers (top-level so pool workers can unpickle it)."""
+    return chunk_papers(batch, strategy=strategy)
 
-    papers = load_arxiv_papers()
-    print(f"Loaded {len(papers)} papers.")
 
+def main():
     chunking_strategy = config.chunking.strategy
     print(f"Using chunking strategy: {chunking_strategy}")
+    workers = config.chunking.num_workers
+
+    # Chunking is CPU-bound and independent per batch, so with more than one
+    # worker the batches are spread over processes. Workers are spawned rather
+    # than forked: they must not inherit the Weaviate gRPC channel or the
+    # dataset's streaming iterator.
+    executor = None
+    if workers > 1:
+        executor = ProcessPoolExecutor(
+            max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+        )
+
+    client = get_weaviate_client()
+    ensure_schema(client)
     
     # For large datasets, process in batches to avoid memory issues
-    # Process papers in batches of 50 to keep memory usage manageable
+    # Papers are streamed from the dataset and pulled a batch at a time, so
+    # only the batches in flight are ever held in memory
     batch_size = 5
-    all_chunks = []
-    
-    for i in range(0, len(papers), batch_size):
-        batch = papers[i:i + batch_size]
-        print(f"Processing papers {i+1} to {min(i+batch_size, len(papers))}...")
-        batch_chunks = chunk_papers(batch, strategy=chunking_strategy)
-        all_chunks.extend(batch_chunks)
-        print(f"  Generated {len(batch_chunks)} chunks (total so far: {len(all_chunks)})")
-    
-    print(f"Total chunks generated: {len(all_chunks)}")
-    index_chunks(client, all_chunks)
+    paper_iter = iter_arxiv_papers()
+    chunk_fn = partial(_chunk_batch, strategy=chunking_strategy)
+    total_papers = 0
+    total_chunks = 0
+
+    def report(first, n, batch_chunks):
+        nonlocal total_chunks
+        total_chunks += len(batch_chunks)
+        print(f"Processed papers {first+1} to {first+n}")
+        print(f"  Generated {len(batch_chunks)} chunks (total so far: {total_chunks})")
+        return batch_chunks
+
+    def iter_batch_chunks():
+        """Yield chunks batch by batch, so none of them are held beyond their batch."""
+        nonlocal total_papers
+        # At most 2 batches per worker are submitted ahead; results are taken
+        # in submission order, so chunk order matches paper order.
+        pending = deque()
+        while batch := list(islice(paper_iter, batch_size)):
+            first = total_papers
+            total_papers += len(batch)
+            if executor is None:
+                yield from report(first, len(batch), chunk_fn(batch))
+                continue
+            pending.append((first, len(batch), executor.submit(chunk_fn, batch)))
+            if len(pending) >= 2 * workers:
+                first, n, future = pending.popleft()
+                yield from report(first, n, future.result())
+        while pending:
+            first, n, future = pending.popleft()
+            yield from report(first, n, future.result())
+
+    try:
+        # index_chunks pulls from the generator one embedding batch at a time, so
+        # batches are embedded and written while later ones are still being chunked
+        index_chunks(client, iter_batch_chunks())
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+    print(f"Loaded {total_papers} papers.")
+    print(f"Total chunks generated: {total_chunks}")
 
     client.close()
     print("Done.")
@@ -0,0 +1,54 @@
+"""
+Export the reranker cross-encoder to ONNX and quantize it to INT8.
+
+Requires the optional export dependencies:
+    pip install "optimum[onnxruntime]"
+
+Usage:
+    python scripts/export_reranker_onnx.py [output_dir]
+    (Must be run from project root directory)
+
+Then point the app at the quantized model:
+    RERANKER_ONNX_PATH=<output_dir>/model_int8.onnx
+"""
+
+import sys
+from pathlib import Path
+
+# Add project root to Python path so we can import 'app'
+project_root = Path(__file__).parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+MODEL_NAME = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+
+
+def main():
+    out_dir = Path(sys.argv[1]) if len(sys.argv) > 1 else project_root / "models" / "reranker-onnx"
+
+    try:
+        from optimum.onnxruntime import ORTModelForSequenceClassification
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+        from transformers import AutoTokenizer
+    except ImportError as e:
+        raise SystemExit(f"Missing export dependency ({e}). Install with: pip install \"optimum[onnxruntime]\"")
+
+    print(f"Exporting {MODEL_NAME} to ONNX in {out_dir}...")
+    model = ORTModelForSequenceClassification.from_pretrained(MODEL_NAME, export=True)
+    model.save_pretrained(out_dir)
+    # The app loads the tokenizer from the model's directory
+    AutoTokenizer.from_pretrained(MODEL_NAME).save_pretrained(out_dir)
+
+    fp32_path = out_dir / "model.onnx"
+    int8_path = out_dir / "model_int8.onnx"
+    print("Quantizing weights to INT8 (dynamic quantization)...")
+    quantize_dynamic(str(fp32_path), str(int8_path), weight_type=QuantType.QInt8)
+
+    fp32_mb = fp32_path.stat().st_size / 1e6
+    int8_mb = int8_path.stat().st_size / 1e6
+    print(f"FP32: {fp32_mb:.1f} MB -> INT8: {int8_mb:.1f} MB")
+    print(f"Done. Set RERANKER_ONNX_PATH={int8_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+import sqlite3
+
+import numpy as np
+import pytest
+
+from app.ingestion import embedding_cache
+from app.ingestion.embedding_cache import EmbeddingCache
+
+
+DIM = 1536
+
+
+def _vectors(n: int, seed: int = 0) -> np.ndarray:
+    # Unit-norm rows, like OpenAI embeddings
+    vecs = np.random.default_rng(seed).standard_normal((n, DIM)).astype(np.float32)
+    return vecs / np.linalg.norm(vecs, axis=1, keepdims=True)
+
+
+def _keys(n: int, model: str = "text-embedding-3-small") -> list:
+    return [EmbeddingCache.make_key(model, f"chunk {i}") for i in range(n)]
+
+
+@pytest.fixture
+def cache_path(tmp_path):
+    return tmp_path / "embeddings.sqlite"
+
+
+def test_make_key_depends_on_model_and_text():
+    key = EmbeddingCache.make_key("m", "text")
+    assert len(key) == 16
+    assert key == EmbeddingCache.make_key("m", "text")
+    assert key != EmbeddingCache.make_key("other", "text")
+    assert key != EmbeddingCache.make_key("m", "text ")
+
+
+def test_unknown_precision_rejected(cache_path):
+    with pytest.raises(ValueError):
+        EmbeddingCache(cache_path, precision="bf16")
+
+
+@pytest.mark.parametrize(
+    "precision, bytes_per_vec, max_err",
+    [
+        ("fp32", DIM * 4, 0.0),
+        # fp16 has an 11-bit significand: relative error <= 2**-11
+        ("fp16", DIM * 2, 2.0 ** -11),
+        # int8 rounds to the nearest step of max_abs / 127
+        ("int8", DIM + 4, 0.5 / 127),
+    ],
+)
+def test_round_trip_error_bounds(cache_path, precision, bytes_per_vec, max_err):
+    vecs = _vectors(20)
+    keys = _keys(len(vecs))
+    cache = EmbeddingCache(cache_path, precision=precision)
+    cache.put_many(keys, vecs)
+
+    out = cache.get_many(keys)
+    for vec, got in zip(vecs, out):
+        assert got.dtype == np.float32
+        assert got.shape == vec.shape
+        # Relative to the largest component, which sets the int8 scale
+        err = np.abs(got - vec).max() / np.abs(vec).max()
+        assert err <= max_err * (1 + 1e-6)
+
+    sizes = cache.conn.execute("SELECT DISTINCT length(vec) FROM emb").fetchall()
+    assert sizes == [(bytes_per_vec,)]
+    cache.close()
+
+
+def test_int8_zero_vector(cache_path):
+    cache = EmbeddingCache(cache_path, precision="int8")
+    key = EmbeddingCache.make_key("m", "empty")
+    cache.put_many([key], np.zeros((1, DIM), dtype=np.float32))
+    (got,) = cache.get_many([key])
+    np.testing.assert_array_equal(got, np.zeros(DIM, dtype=np.float32))
+    cache.close()
+
+
+def test_get_many_aligns_hits_and_misses(cache_path):
+    vecs = _vectors(3)
+    keys = _keys(3)
+    cache = EmbeddingCache(cache_path)
+    cache.put_many([keys[0], keys[2]], vecs[[0, 2]])
+
+    out = cache.get_many(keys)
+    np.testing.assert_array_equal(out[0], vecs[0])
+    assert out[1] is None
+    np.testing.assert_array_equal(out[2], vecs[2])
+    assert cache.get_many([]) == []
+    cache.close()
+
+
+def test_get_many_spans_parameter_chunks(cache_path):
+    n = embedding_cache._MAX_PARAMS * 2 + 7
+    vecs = _vectors(n)
+    keys = _keys(n)
+    cache = EmbeddingCache(cache_path)
+    cache.put_many(keys, vecs)
+
+    out = cache.get_many(keys[::-1])
+    np.testing.assert_array_equal(np.stack(out), vecs[::-1])
+    cache.close()
+
+
+def test_rows_keep_the_precision_they_were_written_in(cache_path):
+    vecs = _vectors(2)
+    keys = _keys(2)
+    cache = EmbeddingCache(cache_path, precision="int8")
+    cache.put_many(keys[:1], vecs[:1])
+    cache.close()
+
+    cache = EmbeddingCache(cache_path, precision="fp32")
+    cache.put_many(keys[1:], vecs[1:])
+    old, new = cache.get_many(keys)
+    assert np.abs(old - vecs[0]).max() <= 0.5 / 127 * np.abs(vecs[0]).max() * (1 + 1e-6)
+    np.testing.assert_array_equal(new, vecs[1])
+    cache.close()
+
+
+def test_batched_writes_are_committed(cache_path, monkeypatch):
+    monkeypatch.setattr(embedding_cache, "_WRITE_BATCH_ROWS", 4)
+    vecs = _vectors(10)
+    keys = _keys(10)
+    cache = EmbeddingCache(cache_path, precision="fp16")
+    cache.put_many(keys, vecs)
+
+    # A second connection only sees committed rows
+    other = sqlite3.connect(str(cache_path))
+    assert other.execute("SELECT COUNT(*) FROM emb").fetchone() == (10,)
+    other.close()
+    cache.close()
+
+    cache = EmbeddingCache(cache_path, precision="fp16")
+    assert all(v is not None for v in cache.get_many(keys))
+    cache.close()
+
+
+def test_checkpoint_truncates_wal(cache_path, monkeypatch):
+    monkeypatch.setattr(embedding_cache, "_CHECKPOINT_EVERY", 5)
+    wal = cache_path.with_name(cache_path.name + "-wal")
+    cache = EmbeddingCache(cache_path)
+
+    cache.put_many(_keys(3), _vectors(3))
+    assert cache._inserts_since_checkpoint == 3
+    assert wal.stat().st_size > 0
+
+    keys = [EmbeddingCache.make_key("m", f"more {i}") for i in range(3)]
+    cache.put_many(keys, _vectors(3, seed=1))
+    assert cache._inserts_since_checkpoint == 0
+    assert wal.stat().st_size == 0
+    cache.close()